@@ -0,0 +1,189 @@
+from concurrent.futures import ThreadPoolExecutor
+from servers import FakeTelegram, FakeYtDlpHost
+import argparse, itertools, json, logging, os, resource, sys, tempfile, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = '123456:bench'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Replay synthetic traffic through the bot against fake Telegram and yt-dlp-host servers.')
+    parser.add_argument('--users', type=int, default=50, help='number of simulated chats')
+    parser.add_argument('--videos', type=int, default=0, help='distinct video URLs shared by the users (default: one per user)')
+    parser.add_argument('--search-ratio', type=float, default=0.2, help='fraction of users that search before downloading')
+    parser.add_argument('--concurrency', type=int, default=16, help='threads replaying user sessions')
+    parser.add_argument('--task-latency', type=float, default=1.0, help='seconds until a fake download task completes')
+    parser.add_argument('--info-latency', type=float, default=0.2, help='seconds until a fake get_info task completes')
+    parser.add_argument('--search-latency', type=float, default=0.05, help='seconds a fake YouTube search takes')
+    parser.add_argument('--file-size', type=int, default=1024 * 1024, help='bytes served per downloaded file')
+    parser.add_argument('--pacing', action='store_true', help='keep the Telegram outbound pacing limits from config.json')
+    parser.add_argument('--rate-limits', action='store_true', help='keep the per-user admission limits from config.json')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds to wait for queued jobs to finish')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    return parser.parse_args()
+
+def write_config(args, telegram, host, workdir):
+    with open(os.path.join(ROOT, 'config.json')) as config_file:
+        config = json.load(config_file)
+    config.update({
+        'BOT_TOKEN': TOKEN,
+        'TELEGRAM_API_URL': f'{telegram.url}/bot{{0}}/{{1}}',
+        'API_BASE_URL': host.url,
+        'ADMIN_API_KEY': 'bench-admin',
+        'ALLOWED_USERS': [f'bench{i}' for i in range(args.users)],
+        'PREMIUM_USERS': [],
+        'AUTO_ALLOWED_CHANNEL': '',
+        'DEFAULT_LANGUAGE': 'en',
+        'RUNTIME': 'threaded',
+        'WEBHOOK_ENABLED': False,
+        'LOCAL_BOT_API': False,
+        'METRICS_PORT': 0,
+        'PREFETCH_ENABLED': False,
+        'SESSION_BACKEND': 'memory',
+        'FILE_ID_CACHE_PATH': os.path.join(workdir, 'file_ids.db'),
+        'SESSION_DB_PATH': os.path.join(workdir, 'sessions.db'),
+        'TEMP_DIR': workdir
+    })
+    if not args.pacing:
+        config['TELEGRAM_RATE_LIMITS'] = {scope: {'per_minute': 10 ** 9, 'burst': 10 ** 6} for scope in ('chat', 'group', 'global')}
+    if not args.rate_limits:
+        config['RATE_LIMITS'] = {}
+    path = os.path.join(workdir, 'config.json')
+    with open(path, 'w') as config_file:
+        json.dump(config, config_file)
+    return path
+
+class FakeYoutubeSearch:
+    latency = 0
+
+    def __init__(self, query, max_results=None):
+        time.sleep(self.latency)
+        self.videos = [
+            {'title': f'{query} result {i}', 'url_suffix': f'/watch?v=search{abs(hash(query)) % 10000}x{i}', 'thumbnails': ['https://i.ytimg.com/vi/bench/hqdefault.jpg']}
+            for i in range(max_results or 20)
+        ]
+
+    def to_dict(self):
+        return self.videos
+
+class Replay:
+    def __init__(self, bot, telegram):
+        self.bot = bot
+        self.telegram = telegram
+        self.update_ids = itertools.count(1)
+        self.latencies = {}
+        self.lock = threading.Lock()
+
+    def user(self, chat_id):
+        return {'id': chat_id, 'is_bot': False, 'first_name': f'Bench {chat_id}', 'username': f'bench{chat_id - 1}', 'language_code': 'en'}
+
+    def message(self, chat_id, message_id, text=''):
+        return {'message_id': message_id, 'date': int(time.time()), 'chat': {'id': chat_id, 'type': 'private'}, 'from': self.user(chat_id), 'text': text}
+
+    def dispatch(self, step, update):
+        from telebot.types import Update
+        update = Update.de_json({'update_id': next(self.update_ids), **update})
+        started = time.perf_counter()
+        self.bot.process_new_updates([update])
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies.setdefault(step, []).append(elapsed)
+
+    def send_text(self, step, chat_id, text):
+        self.dispatch(step, {'message': self.message(chat_id, next(self.update_ids), text)})
+        return self.telegram.last_message.get(chat_id)
+
+    def press(self, step, chat_id, message_id, data):
+        self.dispatch(step, {'callback_query': {'id': str(next(self.update_ids)), 'from': self.user(chat_id), 'chat_instance': str(chat_id), 'data': data, 'message': self.message(chat_id, message_id)}})
+
+    def button(self, chat_id, message_id, prefix):
+        markup = self.telegram.reply_markup(chat_id, message_id) or {}
+        for row in markup.get('inline_keyboard', []):
+            for button in row:
+                if button.get('callback_data', '').startswith(prefix):
+                    return button['callback_data']
+        return None
+
+    def session(self, chat_id, video, search):
+        if search:
+            results_id = self.send_text('search', chat_id, f'bench query {video}')
+            self.press('next_result', chat_id, results_id, 'next_result_0')
+            self.press('select_result', chat_id, results_id, 'select_result_1')
+            message_id = self.telegram.last_message.get(chat_id)
+        else:
+            message_id = self.send_text('link', chat_id, f'https://www.youtube.com/watch?v=bench{video}')
+        self.press('type', chat_id, message_id, 'type_video')
+        data = self.button(chat_id, message_id, 'quality_')
+        if not data:
+            return False
+        self.press('quality', chat_id, message_id, data)
+        return True
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    telegram = FakeTelegram().start()
+    host = FakeYtDlpHost(args.task_latency, args.info_latency, args.file_size).start()
+    workdir = tempfile.mkdtemp(prefix='downvot-bench-')
+    os.environ['DOWNVOT_CONFIG'] = write_config(args, telegram, host, workdir)
+    sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+    import telebot.apihelper
+    telebot.apihelper.API_URL = f'{telegram.url}/bot{{0}}/{{1}}'
+    import state, utils
+    from handlers import register_handlers
+    FakeYoutubeSearch.latency = args.search_latency
+    utils.YoutubeSearch = FakeYoutubeSearch
+    state.bot.threaded = False
+    register_handlers(state.bot)
+
+    replay = Replay(state.bot, telegram)
+    videos = args.videos or args.users
+    searchers = int(args.users * args.search_ratio)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        queued = sum(pool.map(lambda i: replay.session(i + 1, i % videos, i < searchers), range(args.users)))
+    replayed = time.perf_counter() - started
+
+    deadline = time.monotonic() + args.timeout
+    while state.job_executor.stats()['completed'] < queued and time.monotonic() < deadline:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    completed = state.job_executor.stats()['completed']
+
+    telegram_calls = telegram.stats()
+    host_calls = host.stats()
+    all_latencies = [value for values in replay.latencies.values() for value in values]
+    report = {
+        'users': args.users,
+        'jobs_queued': queued,
+        'jobs_completed': completed,
+        'replay_seconds': round(replayed, 3),
+        'total_seconds': round(elapsed, 3),
+        'jobs_per_second': round(completed / elapsed, 2) if elapsed else 0,
+        'handler_latency_ms': {
+            step: {'count': len(values), 'p50': round(percentile(values, 0.5) * 1000, 2), 'p99': round(percentile(values, 0.99) * 1000, 2)}
+            for step, values in sorted(replay.latencies.items()) + [('all', all_latencies)] if values
+        },
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'telegram_calls': telegram_calls,
+        'telegram_calls_per_job': round(sum(telegram_calls.values()) / completed, 2) if completed else None,
+        'host_calls': host_calls,
+        'status_polls_per_job': round(host_calls.get('status', 0) / completed, 2) if completed else None
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"users={report['users']} queued={queued} completed={completed} in {report['total_seconds']}s ({report['jobs_per_second']} jobs/s)")
+    print(f"peak RSS {report['peak_rss_mb']} MB, {report['telegram_calls_per_job']} Telegram calls/job, {report['status_polls_per_job']} status polls/job")
+    print(f"{'step':<16}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for step, values in report['handler_latency_ms'].items():
+        print(f"{step:<16}{values['count']:>8}{values['p50']:>10}{values['p99']:>10}")
+    print('telegram: ' + ', '.join(f'{method}={count}' for method, count in sorted(telegram_calls.items())))
+    print('yt-dlp-host: ' + ', '.join(f'{route}={count}' for route, count in sorted(host_calls.items())))
+
+if __name__ == '__main__':
+    main()
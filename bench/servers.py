@@ -0,0 +1,200 @@
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+import itertools, json, re, threading, time
+
+CHUNK_SIZE = 64 * 1024
+
+class FakeServer:
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.make_handler())
+        self.httpd.daemon_threads = True
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status, payload=None, body=None, content_type='application/json'):
+                if body is None:
+                    body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def do_GET(self):
+                server.handle(self, 'GET')
+
+            def do_POST(self):
+                server.handle(self, 'POST')
+
+            def do_DELETE(self):
+                server.handle(self, 'DELETE')
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class FakeTelegram(FakeServer):
+    MEDIA_METHODS = {'sendVideo': 'video', 'sendAudio': 'audio', 'sendAnimation': 'animation', 'sendDocument': 'document'}
+
+    def __init__(self):
+        super().__init__()
+        self.calls = Counter()
+        self.message_ids = itertools.count(1000)
+        self.last_message = {}
+        self.markups = {}
+
+    @staticmethod
+    def parse_params(handler, body):
+        params = {key: values[0] for key, values in parse_qs(urlparse(handler.path).query).items()}
+        content_type = handler.headers.get('Content-Type') or ''
+        if content_type.startswith('application/json'):
+            params.update(json.loads(body or b'{}'))
+        elif content_type.startswith('multipart/form-data'):
+            head = body[:8192].decode('utf-8', 'ignore')
+            for name, value in re.findall(r'name="([^"]+)"\r\n\r\n([^\r]*)\r\n', head):
+                params[name] = value
+        elif body:
+            params.update({key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()})
+        return params
+
+    def message(self, chat_id, message_id, **extra):
+        return {'message_id': message_id, 'date': int(time.time()), 'chat': {'id': chat_id, 'type': 'private'}, **extra}
+
+    def handle(self, handler, verb):
+        method = handler.path.split('?', 1)[0].rsplit('/', 1)[-1]
+        params = self.parse_params(handler, handler.read_body())
+        chat_id = int(params['chat_id']) if str(params.get('chat_id', '')).lstrip('-').isdigit() else 0
+        with self.lock:
+            self.calls[method] += 1
+            if method in ('editMessageText', 'editMessageMedia', 'editMessageReplyMarkup'):
+                message_id = int(params.get('message_id') or 0)
+            else:
+                message_id = next(self.message_ids)
+            if 'reply_markup' in params:
+                self.markups[(chat_id, message_id)] = params['reply_markup']
+            if method.startswith('send'):
+                self.last_message[chat_id] = message_id
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'bench', 'username': 'bench_bot'}
+        elif method == 'getChatMember':
+            result = {'status': 'member', 'user': {'id': int(params.get('user_id', 0)), 'is_bot': False, 'first_name': 'user'}}
+        elif method in self.MEDIA_METHODS:
+            kind = self.MEDIA_METHODS[method]
+            result = self.message(chat_id, message_id, **{kind: {'file_id': f'file-{message_id}', 'file_unique_id': f'u{message_id}', 'width': 1, 'height': 1, 'duration': 1}})
+        elif method.startswith(('send', 'edit')):
+            result = self.message(chat_id, message_id, text=params.get('text', ''))
+        else:
+            result = True
+        handler.reply(200, {'ok': True, 'result': result})
+
+    def reply_markup(self, chat_id, message_id):
+        with self.lock:
+            markup = self.markups.get((chat_id, message_id))
+        return json.loads(markup) if isinstance(markup, str) else markup
+
+    def stats(self):
+        with self.lock:
+            return dict(self.calls)
+
+class FakeYtDlpHost(FakeServer):
+    LIVE_TYPES = {'get_live_video': 'get_video', 'get_live_audio': 'get_audio'}
+
+    def __init__(self, task_latency=1.0, info_latency=0.2, file_size=1024 * 1024):
+        super().__init__()
+        self.task_latency = task_latency
+        self.info_latency = info_latency
+        self.file_size = file_size
+        self.task_ids = itertools.count(1)
+        self.tasks = {}
+        self.calls = Counter()
+
+    def info(self, url):
+        video_size = int(self.file_size * 0.9)
+        return {
+            'title': f'Benchmark video {url.rsplit("=", 1)[-1]}',
+            'thumbnail': f'{self.url}/thumbnail.jpg',
+            'is_live': False,
+            'duration': 120,
+            'language': 'en',
+            'qualities': {
+                'video': {
+                    str(height): {'height': height, 'width': height * 16 // 9, 'fps': 30, 'dynamic_range': 'SDR', 'filesize': video_size * height // 1080, 'filesize_approx': None}
+                    for height in (360, 720, 1080)
+                },
+                'audio': {
+                    str(abr): {'abr': abr, 'language': 'en', 'filesize': self.file_size - video_size, 'filesize_approx': None}
+                    for abr in (64, 128)
+                }
+            }
+        }
+
+    def handle(self, handler, verb):
+        path = handler.path.split('?', 1)[0]
+        body = handler.read_body()
+        route = path.strip('/').split('/')
+        with self.lock:
+            self.calls[route[0]] += 1
+        if route[0] in ('get_info', 'get_video', 'get_audio', 'get_live_video', 'get_live_audio'):
+            data = json.loads(body or b'{}')
+            task_id = str(next(self.task_ids))
+            latency = self.info_latency if route[0] == 'get_info' else self.task_latency
+            with self.lock:
+                self.tasks[task_id] = {'type': self.LIVE_TYPES.get(route[0], route[0]), 'url': data.get('url', ''), 'ready_at': time.monotonic() + latency}
+            return handler.reply(200, {'task_id': task_id})
+        if route[0] == 'status':
+            task = self.tasks.get(route[1])
+            if not task:
+                return handler.reply(404, {'error': 'Task not found'})
+            if time.monotonic() < task['ready_at']:
+                return handler.reply(200, {'status': 'processing', 'task_type': task['type']})
+            return handler.reply(200, {'status': 'completed', 'task_type': task['type'], 'file': f'/files/{route[1]}/file'})
+        if route[0] == 'files':
+            task = self.tasks.get(route[1])
+            if not task:
+                return handler.reply(404, {'error': 'File not found'})
+            if task['type'] == 'get_info':
+                return handler.reply(200, self.info(task['url']))
+            return self.stream(handler, self.file_size)
+        if route[0] in ('get_key', 'create_key'):
+            return handler.reply(201 if route[0] == 'create_key' else 200, {'key': 'bench-key'})
+        if route[0] == 'check_permissions':
+            return handler.reply(200, {'message': 'ok'})
+        handler.reply(404, {'error': 'Not found'})
+
+    @staticmethod
+    def stream(handler, size):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/octet-stream')
+        handler.send_header('Content-Length', str(size))
+        handler.end_headers()
+        chunk = b'\0' * CHUNK_SIZE
+        remaining = size
+        while remaining > 0:
+            handler.wfile.write(chunk[:remaining])
+            remaining -= CHUNK_SIZE
+
+    def stats(self):
+        with self.lock:
+            return dict(self.calls)
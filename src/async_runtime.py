@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from telebot.async_telebot import AsyncTeleBot
+from yt_dlp_host_api.exceptions import APIError
+from yt_dlp_host_api.task import TaskResult
+from outbound import GovernedMethods
+import asyncio, inspect, logging, time
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+class AsyncRuntime:
+    def __init__(self, handler_workers=16, pool_size=100):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(handler_workers, thread_name_prefix='handler')
+        self.pool_size = pool_size
+        self.session = None
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro):
+        return self.submit(coro).result()
+
+    async def run_blocking(self, fn, *args):
+        return await self.loop.run_in_executor(self.executor, fn, *args)
+
+    async def http(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        return self.session
+
+    def run(self, coro):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(coro)
+        finally:
+            if self.session is not None:
+                self.loop.run_until_complete(self.session.close())
+
+class AsyncBotBridge(GovernedMethods):
+    def __init__(self, token, governor, runtime):
+        self.async_bot = AsyncTeleBot(token)
+        self.governor = governor
+        self.runtime = runtime
+        self.next_steps = {}
+        self.async_bot.message_handler(func=lambda message: message.chat.id in self.next_steps)(self.run_next_step)
+
+    def call_api(self, name, *args, **kwargs):
+        return self.runtime.call(getattr(self.async_bot, name)(*args, **kwargs))
+
+    def __getattr__(self, name):
+        if name == 'async_bot':
+            raise AttributeError(name)
+        attr = getattr(self.async_bot, name)
+        if inspect.iscoroutinefunction(attr):
+            return lambda *args, **kwargs: self.call_api(name, *args, **kwargs)
+        return attr
+
+    def reply_to(self, message, text, **kwargs):
+        return self.send_message(message.chat.id, text, reply_to_message_id=message.message_id, **kwargs)
+
+    def register_next_step_handler(self, message, callback, *args, **kwargs):
+        self.next_steps[message.chat.id] = (callback, args, kwargs)
+
+    def clear_step_handler(self, message):
+        self.next_steps.pop(message.chat.id, None)
+
+    async def run_next_step(self, message):
+        step = self.next_steps.pop(message.chat.id, None)
+        if step:
+            callback, args, kwargs = step
+            await self.run_handler(partial(callback, message, *args, **kwargs))
+
+    async def run_handler(self, fn, *args):
+        try:
+            await self.runtime.run_blocking(fn, *args)
+        except Exception as e:
+            logger.error(f"Handler {getattr(fn, '__name__', fn)} failed: {str(e)}")
+
+    def bridge(self, register):
+        def decorator_factory(*args, **kwargs):
+            def decorator(fn):
+                async def handler(update):
+                    await self.run_handler(fn, update)
+                handler.__name__ = fn.__name__
+                register(*args, **kwargs)(handler)
+                return fn
+            return decorator
+        return decorator_factory
+
+    def message_handler(self, *args, **kwargs):
+        return self.bridge(self.async_bot.message_handler)(*args, **kwargs)
+
+    def callback_query_handler(self, *args, **kwargs):
+        return self.bridge(self.async_bot.callback_query_handler)(*args, **kwargs)
+
+    def inline_handler(self, *args, **kwargs):
+        return self.bridge(self.async_bot.inline_handler)(*args, **kwargs)
+
+    def chosen_inline_handler(self, *args, **kwargs):
+        return self.bridge(self.async_bot.chosen_inline_handler)(*args, **kwargs)
+
+    async def serve(self, interval=1, timeout=20):
+        await self.async_bot.delete_webhook()
+        await self.async_bot.infinity_polling(interval=interval, timeout=timeout)
+
+    def polling(self, interval=1, timeout=20, **kwargs):
+        self.runtime.run(self.serve(interval, timeout))
+
+class AsyncTaskWatcher:
+    def __init__(self, runtime, min_delay=1, max_delay=10, backoff=1.5, timeout=480):
+        self.runtime = runtime
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.timeout = timeout
+        self.watching = 0
+        self.polls = 0
+        self.completed = 0
+        self.failed = 0
+
+    def clamp(self, delay):
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def watch(self, task, expected=0, on_status=None, timeout=None, interval=None):
+        return self.runtime.submit(self.wait(task, expected, on_status, timeout or self.timeout, interval))
+
+    async def get_status(self, task):
+        session = await self.runtime.http()
+        async with session.get(f"{task.client.host_url}/status/{task.task_id}", headers=task.client.headers) as response:
+            data = await response.json(content_type=None)
+            if response.status != 200:
+                raise APIError(data.get('error', 'Unknown error'))
+            return data
+
+    async def wait(self, task, expected, on_status, timeout, interval=None):
+        started = time.monotonic()
+        delay = 0 if interval else self.clamp(expected / 2)
+        self.watching += 1
+        try:
+            while True:
+                await asyncio.sleep(delay)
+                status = await self.get_status(task)
+                self.polls += 1
+                if status['status'] == 'completed':
+                    self.completed += 1
+                    return TaskResult(task.client, status)
+                if status['status'] == 'error':
+                    raise APIError(f"Task failed: {status.get('error', 'Unknown error')}")
+                if status['status'] not in ['waiting', 'processing']:
+                    raise APIError(f"Unknown task status: {status['status']}")
+                elapsed = time.monotonic() - started
+                if elapsed >= timeout:
+                    raise APIError(f"Task did not complete within the expected time (waited {int(elapsed)} seconds)")
+                if on_status:
+                    self.runtime.loop.run_in_executor(self.runtime.executor, self.report, on_status, task, status, elapsed)
+                delay = interval or self.clamp(delay * self.backoff)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.watching -= 1
+
+    @staticmethod
+    def report(on_status, task, status, elapsed):
+        try:
+            on_status(status, elapsed)
+        except Exception as e:
+            logger.warning(f"Progress update for task {task.task_id} failed: {str(e)}")
+
+    def stats(self):
+        return {
+            'watching': self.watching,
+            'polls': self.polls,
+            'completed': self.completed,
+            'failed': self.failed
+        }
@@ -1,28 +1,59 @@
 import logging, time
-from telebot.apihelper import ApiTelegramException, types
-import telebot.apihelper
-from config import load_config, TELEGRAM_API_URL, MAX_FILE_SIZE_MB
+from telebot.apihelper import ApiTelegramException
+import telebot.apihelper, telebot.asyncio_helper
+from config import config_store, TELEGRAM_API_URL, MAX_FILE_SIZE_MB, CONFIG_RELOAD_INTERVAL, RUNTIME, ASYNC_HANDLER_WORKERS, DOWNLOAD_WORKERS, ROLE, METRICS_LISTEN, METRICS_PORT, WEBHOOK_ENABLED, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE, WEBHOOK_WORKERS
+from webhook import WebhookServer
+from metrics import registry, MetricsServer
 from handlers import register_handlers
-from state import bot
+from state import bot, job_executor
 import utils
-import io
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 if TELEGRAM_API_URL:
     telebot.apihelper.API_URL = TELEGRAM_API_URL
+    telebot.asyncio_helper.API_URL = TELEGRAM_API_URL
     logger.info(f"Using custom Telegram API URL: {TELEGRAM_API_URL}")
 else:
     logger.info("Using default Telegram API URL")
 
 register_handlers(bot)
 
+def run_webhook():
+    server = WebhookServer(bot, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE, WEBHOOK_WORKERS)
+    server.routes['/metrics'] = registry.endpoint
+    registry.collect('downvot_webhook', server.stats, counters=('accepted', 'rejected', 'processed', 'failed'))
+    if WEBHOOK_URL:
+        bot.set_webhook(url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH, secret_token=WEBHOOK_SECRET or None)
+        logger.info(f"Webhook registered at {WEBHOOK_URL}")
+    server.serve_forever()
+
+def run_async():
+    if WEBHOOK_ENABLED:
+        logger.warning("Webhook mode is not available with the async runtime, using polling")
+    logger.info(f"Starting bot polling on the async runtime: Bot API calls and task polling run on the event loop, handlers on {ASYNC_HANDLER_WORKERS} threads, downloads on {DOWNLOAD_WORKERS} worker threads")
+    bot.polling(interval=1, timeout=20)
+
 def main():
+    if ROLE == 'worker':
+        from worker import run_worker
+        return run_worker()
+    if ROLE == 'ingress':
+        job_executor.collect(utils.release_job)
+    if RUNTIME == 'async':
+        return run_async()
+    if WEBHOOK_ENABLED:
+        try:
+            run_webhook()
+        except Exception as e:
+            logger.error(f"Webhook mode failed: {e}. Falling back to polling")
+            bot.threaded = True
     restart_count = 0
     while True:
         try:
             logger.info(f"Starting bot polling. Restart count: {restart_count}")
+            bot.remove_webhook()
             bot.polling(none_stop=True, interval=1, timeout=20)
         except ApiTelegramException as e:
             restart_count += 1
@@ -33,65 +64,10 @@ def main():
             logger.error(f"Unexpected error: {e}. Restarting bot. Restart count: {restart_count}")
             time.sleep(5)
 
-# !!!!! Requires fixing !!!!!
-# @bot.inline_handler(lambda query: len(query.query) > 0)
-# def inline_query(query):
-#     try:
-#         url = query.query.strip()
-#         if not url.startswith(('http://', 'https://')):
-#             return
-            
-#         source = utils.detect_source(url)
-#         if not source:
-#             return
-        
-#         client = utils.get_or_create_client(query.from_user)
-#         info = client.get_info(url=url).get_json(['qualities', 'title', 'thumbnail', 'is_live', 'duration'])
-        
-#         if info['is_live']:
-#             return
-        
-#         best_video = list(info["qualities"]["video"].items())[-1]
-#         best_audio = list(info["qualities"]["audio"].items())[-1]
-        
-#         video_task = client.send_task.get_video(
-#             url=url,
-#             video_format=best_video[0],
-#             audio_format=best_audio[0]
-#         )
-
-#         audio_task = client.send_task.get_audio(
-#             url=url,
-#             audio_format=best_audio[0]
-#         )
-
-#         logger.info(f'inline tasks: {video_task.task_id} {audio_task.task_id}')
-
-#         video_result = video_task.get_result(max_retries=config['MAX_GET_RESULT_RETRIES'])
-#         audio_result = audio_task.get_result(max_retries=config['MAX_GET_RESULT_RETRIES'])
-
-#         results = [
-#             types.InlineQueryResultVideo(
-#                 id="video",
-#                 video_url=f'{video_result.get_file_url()}?raw=true',
-#                 title=f"Video: {info['title']}",
-#                 thumbnail_url=info['thumbnail'],
-#                 mime_type="video/mp4"
-#             ),
-#             types.InlineQueryResultAudio(
-#                 id="audio",
-#                 audio_url=f'{audio_result.get_file_url()}?raw=true',
-#                 title=f"Audio: {info['title']}"
-#             )
-#         ]
-            
-#         bot.answer_inline_query(query.id, results, cache_time=0)
-        
-#     except Exception as e:
-#         logger.error(f"Inline query error: {e}")
-
 if __name__ == "__main__":
-    config = load_config()
+    config_store.start_watcher(CONFIG_RELOAD_INTERVAL)
+    if METRICS_PORT:
+        MetricsServer(registry, METRICS_LISTEN, METRICS_PORT).start()
     logger.info("Bot initialized")
     logger.info(f"Max file size: {MAX_FILE_SIZE_MB} MB")
     main()
@@ -1,22 +1,82 @@
 import json
+import logging
 import os
+import signal
+import threading
 
-def load_config():
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
-    with open(config_path, 'r') as config_file:
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.environ.get('DOWNVOT_CONFIG') or os.path.join(os.path.dirname(__file__), '..', 'config.json')
+
+def load_config(path=CONFIG_PATH):
+    with open(path, 'r') as config_file:
         return json.load(config_file)
 
 def save_config(config):
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
-    with open(config_path, 'w') as config_file:
+    with open(CONFIG_PATH, 'w') as config_file:
         json.dump(config, config_file, indent=4)
+    config_store.reload()
+
+class ConfigStore:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.data = {}
+        self.allowed_users = frozenset()
+        self.premium_users = frozenset()
+        self.watcher = None
+        self.reload_event = threading.Event()
+        self.reload()
+
+    def reload(self):
+        with self.lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            data = load_config(self.path)
+            self.data = data
+            self.allowed_users = frozenset(data.get('ALLOWED_USERS', []))
+            self.premium_users = frozenset(data.get('PREMIUM_USERS', []))
+            self.mtime = mtime
+        logger.info(f"Config loaded: {len(self.allowed_users)} allowed users, {len(self.premium_users)} premium users")
+
+    def reload_if_changed(self):
+        try:
+            if os.stat(self.path).st_mtime_ns != self.mtime:
+                self.reload()
+        except Exception as e:
+            logger.error(f"Failed to reload config, keeping previous values: {e}")
+
+    def is_allowed(self, username):
+        return username in self.allowed_users
+
+    def is_premium(self, username):
+        return username in self.premium_users
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def start_watcher(self, interval):
+        if self.watcher:
+            return
+        if hasattr(signal, 'SIGHUP') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.reload_event.set())
+        self.watcher = threading.Thread(target=self._watch, args=(interval,), name='config-watcher', daemon=True)
+        self.watcher.start()
 
-def load_language(lang_code):
-    lang_path = os.path.join(os.path.dirname(__file__), '..', 'lang_files', f'{lang_code}.json')
-    with open(lang_path, 'r', encoding='utf-8') as lang_file:
-        return json.load(lang_file)
+    def _watch(self, interval):
+        while True:
+            if self.reload_event.wait(interval):
+                self.reload_event.clear()
+                logger.info("SIGHUP received, reloading config")
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Failed to reload config, keeping previous values: {e}")
+            else:
+                self.reload_if_changed()
 
-config = load_config()
+config_store = ConfigStore(CONFIG_PATH)
+config = config_store.data
 BOT_TOKEN = config['BOT_TOKEN']
 API_BASE_URL = config['API_BASE_URL']
 ADMIN_API_KEY = config['ADMIN_API_KEY']
@@ -24,12 +84,79 @@ AUTO_CREATE_KEY = config['AUTO_CREATE_KEY']
 AUTO_ALLOWED_CHANNEL = config['AUTO_ALLOWED_CHANNEL']
 DEFAULT_LANGUAGE = config['DEFAULT_LANGUAGE']
 MAX_GET_RESULT_RETRIES = config['MAX_GET_RESULT_RETRIES']
+TASK_POLL_MIN_DELAY = config.get('TASK_POLL_MIN_DELAY', 1)
+TASK_POLL_MAX_DELAY = config.get('TASK_POLL_MAX_DELAY', 10)
+TASK_POLL_BACKOFF = config.get('TASK_POLL_BACKOFF', 1.5)
+TASK_POLL_WORKERS = config.get('TASK_POLL_WORKERS', 4)
+INFO_POLL_INTERVAL = config.get('INFO_POLL_INTERVAL', 0.25)
+TASK_EXPECTED_THROUGHPUT = config.get('TASK_EXPECTED_THROUGHPUT', 5 * 1024 * 1024)
+TASK_PROGRESS_INTERVAL = config.get('TASK_PROGRESS_INTERVAL', 5)
 MAX_SEARCH_RESULTS = config['MAX_SEARCH_RESULTS']
 TELEGRAM_API_URL = config.get('TELEGRAM_API_URL', '')
+RUNTIME = config.get('RUNTIME', 'threaded')
+ROLE = config.get('ROLE', 'standalone')
+WORKER_ID = config.get('WORKER_ID', '')
+METRICS_LISTEN = config.get('METRICS_LISTEN', '127.0.0.1')
+METRICS_PORT = config.get('METRICS_PORT', 0)
+ASYNC_HANDLER_WORKERS = config.get('ASYNC_HANDLER_WORKERS', 16)
+HTTP_POOL_SIZE = config.get('HTTP_POOL_SIZE', 100)
+WEBHOOK_ENABLED = config.get('WEBHOOK_ENABLED', False)
+WEBHOOK_URL = config.get('WEBHOOK_URL', '')
+WEBHOOK_LISTEN = config.get('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = config.get('WEBHOOK_PORT', 8443)
+WEBHOOK_PATH = config.get('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = config.get('WEBHOOK_SECRET', '')
+WEBHOOK_QUEUE_SIZE = config.get('WEBHOOK_QUEUE_SIZE', 1000)
+WEBHOOK_WORKERS = config.get('WEBHOOK_WORKERS', 4)
 MAX_FILE_SIZE_MB = config.get('MAX_FILE_SIZE_MB', 50)
-MAX_TELEGRAM_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024
-LANGUAGES = {
-    'en': load_language('en'),
-    'ru': load_language('ru'),
-    'pl': load_language('pl')
-}
+LOCAL_BOT_API = config.get('LOCAL_BOT_API', False)
+LOCAL_MAX_FILE_SIZE_MB = config.get('LOCAL_MAX_FILE_SIZE_MB', 2000)
+LOCAL_FILES_PATH_MAP = config.get('LOCAL_FILES_PATH_MAP', {})
+MAX_TELEGRAM_FILE_SIZE = (LOCAL_MAX_FILE_SIZE_MB if LOCAL_BOT_API else MAX_FILE_SIZE_MB) * 1024 * 1024
+CONFIG_RELOAD_INTERVAL = config.get('CONFIG_RELOAD_INTERVAL', 5)
+SESSION_MAX_CHATS = config.get('SESSION_MAX_CHATS', 10000)
+SESSION_TTL = config.get('SESSION_TTL', 7 * 24 * 3600)
+SESSION_PROCESSING_TTL = config.get('SESSION_PROCESSING_TTL', 3600)
+SESSION_SWEEP_INTERVAL = config.get('SESSION_SWEEP_INTERVAL', 60)
+SESSION_BACKEND = config.get('SESSION_BACKEND', 'memory')
+SESSION_FLUSH_INTERVAL = config.get('SESSION_FLUSH_INTERVAL', 1)
+CLIENT_CACHE_SIZE = config.get('CLIENT_CACHE_SIZE', 1024)
+CLIENT_CACHE_TTL = config.get('CLIENT_CACHE_TTL', 600)
+MEMBERSHIP_POSITIVE_TTL = config.get('MEMBERSHIP_POSITIVE_TTL', 600)
+MEMBERSHIP_NEGATIVE_TTL = config.get('MEMBERSHIP_NEGATIVE_TTL', 30)
+MEMBERSHIP_STALE_TTL = config.get('MEMBERSHIP_STALE_TTL', 3600)
+MEMBERSHIP_CACHE_SIZE = config.get('MEMBERSHIP_CACHE_SIZE', 10000)
+MEMBERSHIP_CACHE_TTL = config.get('MEMBERSHIP_CACHE_TTL', 86400)
+INFO_CACHE_SIZE = config.get('INFO_CACHE_SIZE', 512)
+INFO_CACHE_TTL = config.get('INFO_CACHE_TTL', 1800)
+INFO_CACHE_LIVE_TTL = config.get('INFO_CACHE_LIVE_TTL', 30)
+SEARCH_CACHE_SIZE = config.get('SEARCH_CACHE_SIZE', 256)
+SEARCH_CACHE_TTL = config.get('SEARCH_CACHE_TTL', 600)
+PREFETCH_ENABLED = config.get('PREFETCH_ENABLED', False)
+PREFETCH_WORKERS = config.get('PREFETCH_WORKERS', 2)
+PREFETCH_QUEUE_SIZE = config.get('PREFETCH_QUEUE_SIZE', 32)
+PREFETCH_MAX_AGE = config.get('PREFETCH_MAX_AGE', 60)
+INLINE_MODE = config.get('INLINE_MODE', False)
+INLINE_DEBOUNCE = config.get('INLINE_DEBOUNCE', 0.6)
+INLINE_WORKERS = config.get('INLINE_WORKERS', 4)
+INLINE_PENDING_TTL = config.get('INLINE_PENDING_TTL', 600)
+INLINE_CACHE_TIME = config.get('INLINE_CACHE_TIME', 300)
+INLINE_CACHE_CHAT = config.get('INLINE_CACHE_CHAT', '')
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+FILE_ID_CACHE_PATH = config.get('FILE_ID_CACHE_PATH') or os.path.join(DATA_DIR, 'file_ids.db')
+SESSION_DB_PATH = config.get('SESSION_DB_PATH') or os.path.join(DATA_DIR, 'sessions.db')
+DOWNLOAD_WORKERS = config.get('DOWNLOAD_WORKERS', 4)
+DOWNLOAD_QUEUE_SIZE = config.get('DOWNLOAD_QUEUE_SIZE', 100)
+MAX_USER_JOBS = config.get('MAX_USER_JOBS', 2)
+JOB_QUEUE_PATH = config.get('JOB_QUEUE_PATH') or os.path.join(DATA_DIR, 'jobs.db')
+JOB_QUEUE_POLL_INTERVAL = config.get('JOB_QUEUE_POLL_INTERVAL', 0.5)
+JOB_LEASE_TIMEOUT = config.get('JOB_LEASE_TIMEOUT', 1800)
+RATE_LIMITS = config.get('RATE_LIMITS', {})
+TELEGRAM_RATE_LIMITS = config.get('TELEGRAM_RATE_LIMITS', {})
+OUTBOUND_MAX_RETRIES = config.get('OUTBOUND_MAX_RETRIES', 3)
+OUTBOUND_MAX_RETRY_AFTER = config.get('OUTBOUND_MAX_RETRY_AFTER', 60)
+DOWNLOAD_CHUNK_SIZE = config.get('DOWNLOAD_CHUNK_SIZE', 1024 * 1024)
+UPLOAD_TIMEOUT = config.get('UPLOAD_TIMEOUT', 600)
+TEMP_DIR = config.get('TEMP_DIR') or None
+LANG_DIR = os.path.join(os.path.dirname(__file__), '..', 'lang_files')
+LANG_RESCAN_INTERVAL = config.get('LANG_RESCAN_INTERVAL', 60)
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging, threading, time
+
+logger = logging.getLogger(__name__)
+
+class Debouncer:
+    def __init__(self, delay, workers):
+        self.delay = delay
+        self.workers = workers
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.pool = None
+        self.scheduled = 0
+        self.superseded = 0
+        self.fired = 0
+
+    def start(self):
+        with self.condition:
+            if self.thread:
+                return
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='debounce')
+            self.thread = threading.Thread(target=self._run, name='debouncer', daemon=True)
+            self.thread.start()
+        logger.info(f"Started debouncer with {self.workers} workers")
+
+    def call(self, key, fn, *args):
+        if not self.thread:
+            self.start()
+        with self.condition:
+            if self.pending.pop(key, None) is not None:
+                self.superseded += 1
+            self.pending[key] = (time.monotonic() + self.delay, fn, args)
+            self.scheduled += 1
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending or next(iter(self.pending.values()))[0] > time.monotonic():
+                    self.condition.wait(next(iter(self.pending.values()))[0] - time.monotonic() if self.pending else None)
+                now = time.monotonic()
+                due = []
+                while self.pending and next(iter(self.pending.values()))[0] <= now:
+                    due.append(self.pending.pop(next(iter(self.pending))))
+                self.fired += len(due)
+            for _, fn, args in due:
+                self.pool.submit(self.fire, fn, args)
+
+    @staticmethod
+    def fire(fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"Debounced call {fn.__name__} failed: {str(e)}")
+
+    def stats(self):
+        with self.condition:
+            return {
+                'pending': len(self.pending),
+                'scheduled': self.scheduled,
+                'superseded': self.superseded,
+                'fired': self.fired
+            }
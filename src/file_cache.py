@@ -0,0 +1,71 @@
+from session_backends import encode_value, decode_object
+import json, os, sqlite3, threading, time
+
+class FileIdCache:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_ids ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, file_id TEXT NOT NULL, created_at REAL NOT NULL, file_url TEXT)"
+        )
+        if 'file_url' not in [row[1] for row in self.conn.execute("PRAGMA table_info(file_ids)")]:
+            self.conn.execute("ALTER TABLE file_ids ADD COLUMN file_url TEXT")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_infos ("
+            "url TEXT PRIMARY KEY, data TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT kind, file_id, file_url FROM file_ids WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row
+
+    def set(self, key, kind, file_id, file_url=None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO file_ids (key, kind, file_id, created_at, file_url) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, file_id, time.time(), file_url)
+            )
+            self.conn.commit()
+
+    def delete(self, key):
+        with self.lock:
+            self.conn.execute("DELETE FROM file_ids WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def get_info(self, url, max_age):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM video_infos WHERE url = ? AND created_at >= ?", (url, time.time() - max_age)).fetchone()
+        return json.loads(row[0], object_hook=decode_object) if row else None
+
+    def set_info(self, url, info, max_age):
+        data = json.dumps(info, separators=(',', ':'), ensure_ascii=False, default=encode_value)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("DELETE FROM video_infos WHERE created_at < ?", (now - max_age,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO video_infos (url, data, created_at) VALUES (?, ?, ?)",
+                (url, data, now)
+            )
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM file_ids").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,50 @@
+class VideoFormat:
+    __slots__ = ('height', 'fps', 'width', 'dynamic_range', 'filesize', 'filesize_approx', 'size')
+
+    def __init__(self, height, fps, width, dynamic_range, filesize, filesize_approx):
+        self.height = height
+        self.fps = fps
+        self.width = width
+        self.dynamic_range = dynamic_range
+        self.filesize = filesize or 0
+        self.filesize_approx = filesize_approx or 0
+        self.size = self.filesize or self.filesize_approx
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('height'), data.get('fps'), data.get('width'), data.get('dynamic_range'), data.get('filesize'), data.get('filesize_approx'))
+
+    @property
+    def hdr(self):
+        return self.dynamic_range == 'HDR10'
+
+    def to_list(self):
+        return [self.height, self.fps, self.width, self.dynamic_range, self.filesize, self.filesize_approx]
+
+class AudioFormat:
+    __slots__ = ('abr', 'language', 'filesize', 'filesize_approx', 'size')
+
+    def __init__(self, abr, language, filesize, filesize_approx):
+        self.abr = abr
+        self.language = language
+        self.filesize = filesize or 0
+        self.filesize_approx = filesize_approx or 0
+        self.size = self.filesize or self.filesize_approx
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('abr'), data.get('language'), data.get('filesize'), data.get('filesize_approx'))
+
+    def to_list(self):
+        return [self.abr, self.language, self.filesize, self.filesize_approx]
+
+def normalize_qualities(qualities):
+    return {
+        'video': {fmt_id: VideoFormat.from_dict(data) for fmt_id, data in qualities.get('video', {}).items()},
+        'audio': {fmt_id: AudioFormat.from_dict(data) for fmt_id, data in qualities.get('audio', {}).items()}
+    }
+
+def normalize_info(info):
+    info = dict(info)
+    info['qualities'] = normalize_qualities(info.get('qualities') or {})
+    return info
@@ -1,11 +1,35 @@
-from state import user_data
-from youtube_search import YoutubeSearch
-from config import MAX_SEARCH_RESULTS
-import utils, logging, re
+from state import user_data, prefetcher
+from ratelimit import RateLimited
+from config import INLINE_MODE
+import utils, logging
 
 logger = logging.getLogger(__name__)
 
 def register_handlers(bot):
+    def run_search(message, query):
+        searching_message = bot.send_message(message.chat.id, utils.get_string('searching', user_data[message.chat.id]['language']))
+        try:
+            results = utils.get_search_results(query)
+            if not results:
+                bot.edit_message_text(
+                    utils.get_string('no_results', user_data[message.chat.id]['language']),
+                    chat_id=message.chat.id,
+                    message_id=searching_message.message_id
+                )
+                return
+            prefetcher.cancel(message.chat.id)
+            user_data[message.chat.id]['search_query'] = utils.normalize_query(query)
+            user_data[message.chat.id].pop('search_result', None)
+
+            utils.show_search_result(message.chat.id, user_data[message.chat.id]['language'], 0, searching_message.message_id)
+        except Exception as e:
+            logger.error(f"Error during YouTube search: {e}")
+            bot.edit_message_text(
+                utils.get_string('search_error', user_data[message.chat.id]['language']).format(error=str(e)),
+                chat_id=message.chat.id,
+                message_id=searching_message.message_id
+            )
+
     @bot.message_handler(commands=['start'])
     @utils.authorized_users_only
     def start_message(message):
@@ -91,28 +115,12 @@ def register_handlers(bot):
         if not query:
             bot.reply_to(message, utils.get_string('enter_search_query', user_data[message.chat.id]['language']))
             return
-        searching_message = bot.send_message(message.chat.id, utils.get_string('searching', user_data[message.chat.id]['language']))
-        try:
-            results = YoutubeSearch(query, max_results=MAX_SEARCH_RESULTS).to_dict()
-            if not results:
-                bot.edit_message_text(
-                    utils.get_string('no_results', user_data[message.chat.id]['language']),
-                    chat_id=message.chat.id,
-                    message_id=searching_message.message_id
-                )
-                return
-            user_data[message.chat.id]['search_results'] = results
-            user_data[message.chat.id]['current_index'] = 0
-
-            utils.show_search_result(message.chat.id, user_data[message.chat.id]['language'], 0, searching_message.message_id)
-        except Exception as e:
-            logger.error(f"Error during YouTube search: {e}")
-            bot.edit_message_text(
-                utils.get_string('search_error', user_data[message.chat.id]['language']).format(error=str(e)),
-                chat_id=message.chat.id,
-                message_id=searching_message.message_id
-            )
+        run_search(message, query)
     
+    @bot.inline_handler(func=lambda query: INLINE_MODE and bool(query.query.strip()))
+    def inline_query(query):
+        utils.debounce_inline_query(query)
+
     @bot.callback_query_handler(func=lambda call: call.data.startswith("admin_"))
     @utils.authorized_users_only
     def admin_callback_query(call):
@@ -143,11 +151,11 @@ def register_handlers(bot):
                 
                 try:
                     client = user_data[message.chat.id]['client']
-                    info = client.get_info(url=cleaned_url).get_json(['qualities', 'title', 'thumbnail', 'is_live', 'duration', 'language'])
+                    info = utils.get_video_info(client, cleaned_url, message.chat.id, message.from_user.username)
                     
                     audio_langs = {}
                     for fmt_id, data in info['qualities']['audio'].items():
-                        lang = data.get('language')
+                        lang = data.language
                         if lang:
                             if lang not in audio_langs:
                                 audio_langs[lang] = []
@@ -171,6 +179,12 @@ def register_handlers(bot):
                         processing_message_id,
                         reply_markup=utils.type_keyboard(user_data[message.chat.id]['language'])
                     )
+                except RateLimited as e:
+                    bot.edit_message_text(
+                        utils.get_string('rate_limited', user_data[message.chat.id]['language']).format(seconds=e.retry_after),
+                        message.chat.id,
+                        processing_message_id
+                    )
                 except Exception as e:
                     logger.error(f"Error getting video information: {str(e)}")
                     bot.edit_message_text(
@@ -181,27 +195,7 @@ def register_handlers(bot):
             else:
                 bot.reply_to(message, utils.get_string('unknown_source', user_data[message.chat.id]['language']))
         else:
-            searching_message = bot.send_message(message.chat.id, utils.get_string('searching', user_data[message.chat.id]['language']))
-            try:
-                results = YoutubeSearch(message.text, max_results=MAX_SEARCH_RESULTS).to_dict()
-                if not results:
-                    bot.edit_message_text(
-                        utils.get_string('no_results', user_data[message.chat.id]['language']),
-                        chat_id=message.chat.id,
-                        message_id=searching_message.message_id
-                    )
-                    return
-                user_data[message.chat.id]['search_results'] = results
-                user_data[message.chat.id]['current_index'] = 0
-
-                utils.show_search_result(message.chat.id, user_data[message.chat.id]['language'], 0, searching_message.message_id)
-            except Exception as e:
-                logger.error(f"Error during YouTube search: {e}")
-                bot.edit_message_text(
-                    utils.get_string('search_error', user_data[message.chat.id]['language']).format(error=str(e)),
-                    chat_id=message.chat.id,
-                    message_id=searching_message.message_id
-                )
+            run_search(message, message.text)
 
     @bot.callback_query_handler(func=lambda call: call.data.startswith("lang_"))
     def callback_language(call):
@@ -282,12 +276,12 @@ def register_handlers(bot):
                     bot.edit_message_text(utils.get_string('getting_video_info', user_data[chat_id]['language']), chat_id, processing_message_id)
                     try:
                         client = user_data[chat_id]['client']
-                        info = client.get_info(url=user_data[chat_id][processing_message_id]['url']).get_json(['qualities', 'title', 'thumbnail', 'is_live', 'duration', 'language'])
+                        info = utils.get_video_info(client, user_data[chat_id][processing_message_id]['url'], chat_id, call.from_user.username)
                         user_data[chat_id][processing_message_id]['file_info'] = info
                         
                         audio_langs = {}
                         for fmt_id, data in info['qualities']['audio'].items():
-                            lang = data.get('language', 'orig')
+                            lang = data.language or 'orig'
                             if lang not in audio_langs:
                                 audio_langs[lang] = []
                             audio_langs[lang].append(fmt_id)
@@ -299,6 +293,9 @@ def register_handlers(bot):
                         elif default_lang not in audio_langs:
                             default_lang = next(iter(audio_langs))
                         user_data[chat_id][processing_message_id]['selected_audio_lang'] = default_lang
+                    except RateLimited as e:
+                        bot.edit_message_text(utils.get_string('rate_limited', user_data[chat_id]['language']).format(seconds=e.retry_after), chat_id, processing_message_id)
+                        return
                     except Exception as e:
                         logger.error(f"Error getting video information: {str(e)}")
                         bot.edit_message_text(utils.get_string('video_info_error', user_data[chat_id]['language']), chat_id, processing_message_id)
@@ -308,7 +305,7 @@ def register_handlers(bot):
                         utils.get_string('specify_recording_duration', user_data[chat_id]['language']), 
                         chat_id, 
                         processing_message_id, 
-                        reply_markup=utils.duration_keyboard(user_data[chat_id]['language'], processing_message_id)
+                        reply_markup=utils.duration_keyboard(user_data[chat_id]['language'])
                     )
                 else:
                     available_qualities = info['qualities']
@@ -319,14 +316,14 @@ def register_handlers(bot):
                         reply_markup=utils.quality_keyboard(available_qualities, chat_id, processing_message_id)
                     )
             elif call.data.startswith('duration_'):
-                duration, processing_message_id = call.data.split('_')[1:]
+                duration = call.data.split('_')[1]
                 user_data[chat_id][processing_message_id]['duration'] = int(duration)
                 available_qualities = user_data[chat_id][processing_message_id]['file_info']['qualities']
                 bot.edit_message_text(utils.get_string('select_video_quality', user_data[chat_id]['language']), chat_id, processing_message_id, reply_markup=utils.quality_keyboard(available_qualities, chat_id, processing_message_id))
             elif call.data.startswith("select_video_quality_"):
                 processing_message_id = call.data.split("_")[-1]
                 available_qualities = user_data[chat_id][processing_message_id]['file_info']['qualities']
-                bot.edit_message_text(utils.get_string('select_video_quality', user_data[chat_id]['language']), chat_id, processing_message_id, reply_markup=utils.video_quality_keyboard(available_qualities, processing_message_id))
+                bot.edit_message_text(utils.get_string('select_video_quality', user_data[chat_id]['language']), chat_id, processing_message_id, reply_markup=utils.video_quality_keyboard(available_qualities, processing_message_id, chat_id))
             elif call.data.startswith("video_quality_"):
                 quality, processing_message_id = call.data.split("_")[2:]
                 user_data[chat_id][processing_message_id]['video_format'] = quality
@@ -365,12 +362,12 @@ def register_handlers(bot):
                 processing_message_id, video_quality, audio_quality = call.data.split("_")[1:]
                 user_data[chat_id][processing_message_id]['video_format'] = video_quality
                 user_data[chat_id][processing_message_id]['audio_format'] = audio_quality
-                utils.process_request(chat_id, processing_message_id)
-                logger.info(f"Link from user {call.message.from_user.username} successfully processed!")
+                utils.enqueue_request(chat_id, processing_message_id, call.from_user.username)
+                logger.info(f"Link from user {call.message.from_user.username} queued for processing")
             elif call.data.startswith("select_output_format_"):
                 processing_message_id = call.data.split("_")[-1]
                 file_type = user_data[chat_id][processing_message_id]['file_type']
-                bot.edit_message_text(utils.get_string('select_output_format', user_data[chat_id]['language']), chat_id, processing_message_id, reply_markup=utils.output_format_keyboard(file_type, user_data[chat_id]['language'], processing_message_id))
+                bot.edit_message_text(utils.get_string('select_output_format', user_data[chat_id]['language']), chat_id, processing_message_id, reply_markup=utils.output_format_keyboard(file_type, user_data[chat_id]['language'], processing_message_id, chat_id))
             elif call.data.startswith("format_"):
                 parts = call.data.split("_")
                 output_format = parts[1]
@@ -433,21 +430,17 @@ def register_handlers(bot):
                 bot.edit_message_text(utils.get_string('select_quality', user_data[chat_id]['language']), chat_id, processing_message_id, reply_markup=utils.quality_keyboard(available_qualities, chat_id, processing_message_id, selected_video=user_data[chat_id][processing_message_id]['video_format'], selected_audio=user_data[chat_id][processing_message_id]['audio_format']))
             elif call.data.startswith("prev_result_"):
                 current_index = int(call.data.split("_")[-1])
-                user_data[call.message.chat.id]['current_index'] = max(0, current_index - 1)
-                utils.show_search_result(call.message.chat.id, user_data[chat_id]['language'], user_data[call.message.chat.id]['current_index'], call.message.message_id)
+                utils.show_search_result(call.message.chat.id, user_data[chat_id]['language'], max(0, current_index - 1), call.message.message_id)
             elif call.data.startswith("next_result_"):
                 current_index = int(call.data.split("_")[-1])
-                user_data[call.message.chat.id]['current_index'] = min(len(user_data[call.message.chat.id]['search_results']) - 1, current_index + 1)
-                utils.show_search_result(call.message.chat.id, user_data[chat_id]['language'], user_data[call.message.chat.id]['current_index'], call.message.message_id)
+                utils.show_search_result(call.message.chat.id, user_data[chat_id]['language'], current_index + 1, call.message.message_id)
             elif call.data.startswith("select_result_"):
                 index = int(call.data.split("_")[-1])
-                result = user_data[call.message.chat.id]['search_results'][index]
-                video_id_match = re.search(r'[?&]v=([^&]+)', result['url_suffix'])
-                if video_id_match:
-                    video_id = video_id_match.group(1)
-                    link = f"https://www.youtube.com/watch?v={video_id}"
-                else: 
-                    link = f"https://www.youtube.com{result['url_suffix']}"
+                result = utils.search_result_at(call.message.chat.id, index)
+                if result is None:
+                    bot.send_message(call.message.chat.id, utils.get_string('no_results', user_data[call.message.chat.id]['language']))
+                    return
+                link = utils.search_result_url(result)
                 source, cleaned_url = utils.detect_source(link)
 
                 if source:
@@ -460,11 +453,11 @@ def register_handlers(bot):
                     
                     try:
                         client = user_data[chat_id]['client']
-                        info = client.get_info(url=cleaned_url).get_json(['qualities', 'title', 'thumbnail', 'is_live', 'duration', 'language'])
+                        info = utils.get_video_info(client, cleaned_url, chat_id, call.from_user.username)
                         
                         audio_langs = {}
                         for fmt_id, data in info['qualities']['audio'].items():
-                            lang = data.get('language')
+                            lang = data.language
                             if lang:
                                 if lang not in audio_langs:
                                     audio_langs[lang] = []
@@ -488,6 +481,12 @@ def register_handlers(bot):
                             processing_message_id,
                             reply_markup=utils.type_keyboard(user_data[chat_id]['language'])
                         )
+                    except RateLimited as e:
+                        bot.edit_message_text(
+                            utils.get_string('rate_limited', user_data[chat_id]['language']).format(seconds=e.retry_after),
+                            chat_id,
+                            processing_message_id
+                        )
                     except Exception as e:
                         logger.error(f"Error getting video information: {str(e)}")
                         bot.edit_message_text(
@@ -0,0 +1,87 @@
+from string import Formatter
+import json, logging, os, threading, time
+
+logger = logging.getLogger(__name__)
+
+def template_fields(template):
+    return {field.split('.')[0].split('[')[0] for _, field, _, _ in Formatter().parse(template) if field}
+
+class Catalog:
+    def __init__(self, path, default_language, rescan_interval=60):
+        self.path = path
+        self.default_language = default_language
+        self.rescan_interval = rescan_interval
+        self.lock = threading.Lock()
+        self.files = self.scan()
+        self.scanned = time.monotonic()
+        self.fields = {}
+        self.languages = {}
+        self.languages[default_language] = self.base = self.compile(default_language, {})
+
+    def scan(self):
+        return {name[:-5]: os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith('.json')}
+
+    def rescan(self):
+        now = time.monotonic()
+        with self.lock:
+            if now - self.scanned < self.rescan_interval:
+                return False
+            self.scanned = now
+            files = self.scan()
+            added = sorted(files.keys() - self.files.keys())
+            self.files = files
+        if added:
+            logger.info(f"Found new language files: {', '.join(added)}")
+        return bool(added)
+
+    def read(self, lang_code):
+        with open(self.files[lang_code], 'r', encoding='utf-8') as lang_file:
+            return json.load(lang_file)
+
+    def compile(self, lang_code, base):
+        strings = dict(base)
+        for key, value in self.read(lang_code).items():
+            if isinstance(value, str):
+                try:
+                    fields = template_fields(value)
+                except ValueError as e:
+                    logger.warning(f"Invalid template '{key}' in {lang_code}: {e}, using {self.default_language}")
+                    continue
+                if not base:
+                    self.fields[key] = fields
+                elif key in self.fields and not fields <= self.fields[key]:
+                    logger.warning(f"Template '{key}' in {lang_code} uses unknown fields {sorted(fields - self.fields[key])}, using {self.default_language}")
+                    continue
+            strings[key] = value
+        logger.info(f"Loaded {len(strings)} strings for language {lang_code}")
+        return strings
+
+    def language(self, lang_code):
+        strings = self.languages.get(lang_code)
+        if strings is not None:
+            return strings
+        if lang_code not in self.files and not (self.rescan() and lang_code in self.files):
+            return self.base
+        with self.lock:
+            strings = self.languages.get(lang_code)
+            if strings is None:
+                try:
+                    strings = self.compile(lang_code, self.base)
+                except Exception as e:
+                    logger.error(f"Failed to load language {lang_code}: {e}")
+                    strings = self.base
+                self.languages[lang_code] = strings
+        return strings
+
+    def get(self, key, lang_code):
+        strings = self.languages.get(lang_code) or self.language(lang_code)
+        return strings.get(key, key)
+
+    def codes(self):
+        return [self.default_language] + sorted(code for code in self.files if code != self.default_language)
+
+    def stats(self):
+        return {
+            'available': len(self.files),
+            'loaded': len({id(strings) for strings in self.languages.values()})
+        }
@@ -0,0 +1,211 @@
+from jobs import QueueFull, UserLimitReached, queue_position
+import json, logging, os, socket, sqlite3, threading, time
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    def __init__(self, path, queue_size, per_user_limit, poll_interval=0.5, lease_timeout=1800, on_submit=None, heartbeat_interval=None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.queue_size = queue_size
+        self.per_user_limit = per_user_limit
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval or min(30, lease_timeout / 3)
+        self.on_submit = on_submit
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_key TEXT NOT NULL, name TEXT NOT NULL, args TEXT NOT NULL, "
+            "state TEXT NOT NULL, worker TEXT, error TEXT, created_at REAL NOT NULL, lease_until REAL, finished_at REAL, dedup_key TEXT)"
+        )
+        if 'dedup_key' not in [row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")]:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN dedup_key TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_key, state)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, state)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS workers (worker_id TEXT PRIMARY KEY, threads INTEGER NOT NULL, seen_at REAL NOT NULL)")
+        self.threads = []
+        self.active = set()
+        self.workers = 0
+        self.completed = 0
+        self.failed = 0
+        self.requeued = 0
+        self.lost = 0
+
+    def transaction(self, sql, params=()):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = sql(self.conn) if callable(sql) else self.conn.execute(sql, params).fetchall()
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def submit(self, user_key, fn, *args, key=None):
+        if self.on_submit:
+            self.on_submit()
+        payload = json.dumps(args)
+
+        def insert(conn):
+            now = time.time()
+            active = conn.execute("SELECT COUNT(*) FROM jobs WHERE user_key = ? AND state IN ('queued', 'running')", (str(user_key),)).fetchone()[0]
+            if active >= self.per_user_limit:
+                raise UserLimitReached(self.per_user_limit)
+            counts = dict(conn.execute("SELECT user_key, COUNT(*) FROM jobs WHERE state = 'queued' GROUP BY user_key").fetchall())
+            if sum(counts.values()) >= self.queue_size:
+                raise QueueFull(self.queue_size)
+            conn.execute(
+                "INSERT INTO jobs (user_key, name, args, state, created_at, dedup_key) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (str(user_key), fn.__name__, payload, now, key)
+            )
+            counts[str(user_key)] = counts.get(str(user_key), 0) + 1
+            threads = conn.execute("SELECT COALESCE(SUM(threads), 0) FROM workers WHERE seen_at >= ?", (now - 3 * self.heartbeat_interval,)).fetchone()[0]
+            running = conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'running'").fetchone()[0]
+            return queue_position(counts, str(user_key), max(0, threads - running))
+
+        return self.transaction(insert)
+
+    def claim(self, worker_id):
+        def take(conn):
+            now = time.time()
+            expired = conn.execute("UPDATE jobs SET state = 'queued', worker = NULL WHERE state = 'running' AND lease_until < ?", (now,)).rowcount
+            if expired:
+                self.requeued += expired
+                logger.warning(f"Requeued {expired} jobs whose worker lease expired")
+            row = conn.execute(
+                "SELECT id, user_key, name, args FROM jobs AS job WHERE state = 'queued' AND (dedup_key IS NULL OR NOT EXISTS "
+                "(SELECT 1 FROM jobs WHERE dedup_key = job.dedup_key AND state = 'running' AND worker != ?)) ORDER BY "
+                "(SELECT COUNT(*) FROM jobs WHERE user_key = job.user_key AND state = 'running'), id LIMIT 1",
+                (worker_id,)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE jobs SET state = 'running', worker = ?, lease_until = ? WHERE id = ?", (worker_id, now + self.lease_timeout, row[0]))
+            return row
+
+        return self.transaction(take)
+
+    def finish(self, job_id, worker_id, error=None):
+        updated = self.transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE id = ? AND worker = ? AND state = 'running'",
+            ('failed' if error else 'done', error, time.time(), job_id, worker_id)
+        ).rowcount)
+        if not updated:
+            with self.lock:
+                self.lost += 1
+            logger.warning(f"Lease on job {job_id} was taken over by another worker, dropping its result")
+        return bool(updated)
+
+    def heartbeat(self, worker_id):
+        with self.lock:
+            active = list(self.active)
+
+        def renew(conn):
+            now = time.time()
+            conn.executemany(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                [(now + self.lease_timeout, job_id, worker_id) for job_id in active]
+            )
+            conn.execute("INSERT OR REPLACE INTO workers (worker_id, threads, seen_at) VALUES (?, ?, ?)", (worker_id, self.workers, now))
+            conn.execute("DELETE FROM workers WHERE seen_at < ?", (now - 3 * self.heartbeat_interval,))
+
+        self.transaction(renew)
+
+    def _heartbeat_loop(self, worker_id):
+        while True:
+            try:
+                self.heartbeat(worker_id)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to renew job leases: {e}")
+            time.sleep(self.heartbeat_interval)
+
+    def serve(self, handlers, workers, worker_id=None):
+        worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.workers = workers
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(worker_id,), name='queue-heartbeat', daemon=True)
+        heartbeat.start()
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, args=(handlers, worker_id), name=f'queue-worker-{i}', daemon=True)
+            self.threads.append(thread)
+            thread.start()
+        logger.info(f"Worker {worker_id} consuming jobs with {workers} threads")
+        for thread in self.threads:
+            thread.join()
+
+    def _work(self, handlers, worker_id):
+        while True:
+            try:
+                job = self.claim(worker_id)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to claim a job: {e}")
+                job = None
+            if not job:
+                time.sleep(self.poll_interval)
+                continue
+            job_id, user_key, name, args = job
+            with self.lock:
+                self.active.add(job_id)
+            error = None
+            try:
+                handler = handlers.get(name)
+                if handler is None:
+                    raise ValueError(f"No handler for job {name}")
+                handler(*json.loads(args))
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                logger.error(f"Queued job {job_id} for {user_key} failed: {error}")
+            with self.lock:
+                self.active.discard(job_id)
+                self.completed += 1
+                if error:
+                    self.failed += 1
+            try:
+                self.finish(job_id, worker_id, error)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to report job {job_id}: {e}")
+
+    def collect(self, on_done):
+        def collect_loop():
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    def take(conn):
+                        rows = conn.execute("SELECT id, name, args, error FROM jobs WHERE state IN ('done', 'failed')").fetchall()
+                        conn.executemany("DELETE FROM jobs WHERE id = ?", [(row[0],) for row in rows])
+                        return rows
+                    finished = self.transaction(take)
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to collect finished jobs: {e}")
+                    continue
+                for job_id, name, args, error in finished:
+                    with self.lock:
+                        self.completed += 1
+                        if error:
+                            self.failed += 1
+                    try:
+                        on_done(name, json.loads(args), error)
+                    except Exception as e:
+                        logger.error(f"Failed to release job {job_id}: {e}")
+
+        thread = threading.Thread(target=collect_loop, name='job-collector', daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            users = self.conn.execute("SELECT COUNT(DISTINCT user_key) FROM jobs WHERE state IN ('queued', 'running')").fetchone()[0]
+            return {
+                'workers': self.workers,
+                'queued': counts.get('queued', 0),
+                'running': counts.get('running', 0),
+                'completed': self.completed,
+                'failed': self.failed,
+                'requeued': self.requeued,
+                'lost': self.lost,
+                'users': users
+            }
@@ -0,0 +1,98 @@
+from collections import deque
+import logging, threading
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    pass
+
+class UserLimitReached(Exception):
+    pass
+
+def queue_position(counts, user_key, idle):
+    rank = counts[user_key]
+    ahead = sum(min(count, rank) for key, count in counts.items() if key != user_key) + rank
+    return max(0, ahead - idle)
+
+class JobExecutor:
+    def __init__(self, workers, queue_size, per_user_limit):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.per_user_limit = per_user_limit
+        self.queues = {}
+        self.order = deque()
+        self.queued = 0
+        self.condition = threading.Condition()
+        self.user_jobs = {}
+        self.threads = []
+        self.idle = 0
+        self.running = 0
+        self.completed = 0
+
+    def start(self):
+        with self.condition:
+            if self.threads:
+                return
+            self.idle = self.workers
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'download-worker-{i}', daemon=True)
+                self.threads.append(thread)
+                thread.start()
+        logger.info(f"Started {self.workers} download workers")
+
+    def submit(self, user_key, fn, *args, key=None):
+        if not self.threads:
+            self.start()
+        with self.condition:
+            if self.user_jobs.get(user_key, 0) >= self.per_user_limit:
+                raise UserLimitReached(self.per_user_limit)
+            if self.queued >= self.queue_size:
+                raise QueueFull(self.queue_size)
+            user_queue = self.queues.get(user_key)
+            if user_queue is None:
+                user_queue = self.queues[user_key] = deque()
+                self.order.append(user_key)
+            user_queue.append((fn, args))
+            self.queued += 1
+            self.user_jobs[user_key] = self.user_jobs.get(user_key, 0) + 1
+            position = queue_position({key: len(queue) for key, queue in self.queues.items()}, user_key, self.idle)
+            self.condition.notify()
+        return position
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.queued:
+                    self.condition.wait()
+                self.idle -= 1
+                user_key = self.order.popleft()
+                user_queue = self.queues[user_key]
+                fn, args = user_queue.popleft()
+                if user_queue:
+                    self.order.append(user_key)
+                else:
+                    del self.queues[user_key]
+                self.queued -= 1
+                self.running += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Download job for {user_key} failed: {str(e)}")
+            finally:
+                with self.condition:
+                    self.idle += 1
+                    self.running -= 1
+                    self.completed += 1
+                    self.user_jobs[user_key] -= 1
+                    if not self.user_jobs[user_key]:
+                        del self.user_jobs[user_key]
+
+    def stats(self):
+        with self.condition:
+            return {
+                'workers': self.workers,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'users': len(self.user_jobs)
+            }
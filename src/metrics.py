@@ -0,0 +1,188 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import contextmanager
+import logging, threading, time
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels) + '}'
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self.lock:
+            return [f'{self.name}{format_labels(key)} {value}' for key, value in self.values.items()]
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for key, (counts, count, total) in self.values.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{format_labels(key + (("le", bound),))} {bucket_count}')
+                lines.append(f'{self.name}_bucket{format_labels(key + (("le", "+Inf"),))} {count}')
+                lines.append(f'{self.name}_count{format_labels(key)} {count}')
+                lines.append(f'{self.name}_sum{format_labels(key)} {total}')
+        return lines
+
+class StatsCollector:
+    def __init__(self, prefix, fn, labels=None, counters=()):
+        self.prefix = prefix
+        self.fn = fn
+        self.labels = tuple(sorted((labels or {}).items()))
+        self.counters = counters
+
+    def flatten(self, stats, prefix):
+        for key, value in stats.items():
+            name = f'{prefix}_{key}'
+            if isinstance(value, dict):
+                yield from self.flatten(value, name)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield key, name, value
+
+    def samples(self):
+        for key, name, value in self.flatten(self.fn(), self.prefix):
+            yield name, 'counter' if key in self.counters else 'gauge', f'{name}{format_labels(self.labels)} {value}'
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help_text):
+        return self.add(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self.add(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self.add(Histogram(name, help_text, buckets))
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self, prefix, fn, labels=None, counters=()):
+        self.collectors.append(StatsCollector(prefix, fn, labels, counters))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.header() + metric.render()
+        families = {}
+        for collector in self.collectors:
+            try:
+                for name, kind, line in collector.samples():
+                    families.setdefault(name, [f'# TYPE {name} {kind}']).append(line)
+            except Exception as e:
+                logger.warning(f"Failed to collect {collector.prefix} metrics: {e}")
+        for family in families.values():
+            lines += family
+        return '\n'.join(lines) + '\n'
+
+    def endpoint(self):
+        return self.render().encode('utf-8'), CONTENT_TYPE
+
+class MetricsServer:
+    def __init__(self, registry, host, port):
+        self.registry = registry
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body, content_type = server.registry.endpoint()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True).start()
+        host, port = self.httpd.server_address[:2]
+        logger.info(f"Metrics available at http://{host}:{port}/metrics")
+
+registry = Registry()
+requests_total = registry.counter('downvot_requests_total', 'Handled updates by authorization result')
+auth_seconds = registry.histogram('downvot_auth_seconds', 'Time spent authorizing an update')
+info_seconds = registry.histogram('downvot_info_fetch_seconds', 'Time to fetch video info from yt-dlp-host on a cache miss')
+search_seconds = registry.histogram('downvot_search_seconds', 'Time spent in YoutubeSearch on a cache miss')
+stage_seconds = registry.histogram('downvot_job_stage_seconds', 'Time spent in each download job stage')
+jobs_total = registry.counter('downvot_jobs_total', 'Download jobs by file type, output format and result')
+bytes_total = registry.counter('downvot_bytes_total', 'Bytes downloaded from yt-dlp-host and uploaded to Telegram')
@@ -0,0 +1,143 @@
+from telebot.apihelper import ApiTelegramException
+from cache import TTLCache
+from ratelimit import TokenBucket
+import inspect, logging, threading, time
+import telebot
+
+logger = logging.getLogger(__name__)
+
+class OutboundGovernor:
+    def __init__(self, limits, max_retries=3, max_retry_after=60, max_chats=10000):
+        self.chat_limit = limits.get('chat') or {'per_minute': 60, 'burst': 3}
+        self.group_limit = limits.get('group') or {'per_minute': 20, 'burst': 3}
+        self.global_bucket = TokenBucket(**(limits.get('global') or {'per_minute': 1800, 'burst': 30}))
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.chats = TTLCache(max_chats, 60 * max(self.chat_limit['burst'] / self.chat_limit['per_minute'], self.group_limit['burst'] / self.group_limit['per_minute']))
+        self.blocked_until = {}
+        self.edits = {}
+        self.sequence = 0
+        self.priority_waiting = 0
+        self.condition = threading.Condition()
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.throttled = 0
+
+    def chat_bucket(self, chat_id):
+        bucket = self.chats.get(chat_id)
+        if bucket is None:
+            limit = self.group_limit if str(chat_id).startswith(('-', '@')) else self.chat_limit
+            bucket = TokenBucket(limit['per_minute'], limit['burst'])
+        return bucket
+
+    def wait_time(self, chat_id, bucket, now):
+        waits = [self.global_bucket.wait_time(), self.blocked_until.get(None, 0) - now]
+        if bucket is not None:
+            waits += [bucket.wait_time(), self.blocked_until.get(chat_id, 0) - now]
+        return max(waits)
+
+    def acquire(self, chat_id, priority=False, edit_key=None, sequence=None):
+        with self.condition:
+            if priority:
+                self.priority_waiting += 1
+            try:
+                while True:
+                    if edit_key is not None and self.edits.get(edit_key) != sequence:
+                        self.coalesced += 1
+                        return False
+                    now = time.monotonic()
+                    self.global_bucket.refill(now)
+                    bucket = self.chat_bucket(chat_id) if chat_id is not None else None
+                    if bucket is not None:
+                        bucket.refill(now)
+                    wait = self.wait_time(chat_id, bucket, now)
+                    if wait <= 0 and (priority or self.global_bucket.tokens >= 1 + self.priority_waiting):
+                        self.global_bucket.tokens -= 1
+                        if bucket is not None:
+                            bucket.tokens -= 1
+                            self.chats.set(chat_id, bucket)
+                        return True
+                    self.throttled += 1
+                    self.condition.wait(max(wait, 0.05))
+            finally:
+                if priority:
+                    self.priority_waiting -= 1
+                    self.condition.notify_all()
+
+    def block(self, chat_id, retry_after):
+        with self.condition:
+            self.blocked_until[chat_id] = max(self.blocked_until.get(chat_id, 0), time.monotonic() + retry_after)
+            for key in [key for key, until in self.blocked_until.items() if until < time.monotonic()]:
+                del self.blocked_until[key]
+
+    def call(self, fn, chat_id=None, priority=False, message_id=None, method=None):
+        edit_key = sequence = None
+        if message_id is not None:
+            edit_key = (chat_id, str(message_id), method)
+            with self.condition:
+                self.sequence += 1
+                sequence = self.edits[edit_key] = self.sequence
+        try:
+            for attempt in range(self.max_retries + 1):
+                if not self.acquire(chat_id, priority, edit_key, sequence):
+                    return None
+                try:
+                    result = fn()
+                    self.sent += 1
+                    return result
+                except ApiTelegramException as e:
+                    retry_after = (e.result_json.get('parameters') or {}).get('retry_after') if e.error_code == 429 else None
+                    if retry_after is None or attempt == self.max_retries or retry_after > self.max_retry_after:
+                        raise
+                    logger.warning(f"Telegram flood limit for chat {chat_id}, retrying in {retry_after}s")
+                    self.retried += 1
+                    self.block(chat_id, retry_after)
+        finally:
+            if edit_key is not None:
+                with self.condition:
+                    if self.edits.get(edit_key) == sequence:
+                        del self.edits[edit_key]
+
+    def stats(self):
+        with self.condition:
+            return {
+                'chats': len(self.chats),
+                'sent': self.sent,
+                'coalesced': self.coalesced,
+                'retried': self.retried,
+                'throttled': self.throttled,
+                'pending_edits': len(self.edits)
+            }
+
+def governed(name, priority=False, edit=False):
+    signature = inspect.signature(getattr(telebot.TeleBot, name))
+
+    def method(self, *args, **kwargs):
+        arguments = signature.bind_partial(self, *args, **kwargs).arguments
+        chat_id = arguments.get('chat_id')
+        message_id = arguments.get('message_id') if edit else None
+        return self.governor.call(lambda: self.call_api(name, *args, **kwargs), chat_id, priority, message_id, name)
+
+    method.__name__ = name
+    return method
+
+class GovernedMethods:
+    send_message = governed('send_message')
+    send_photo = governed('send_photo', priority=True)
+    delete_message = governed('delete_message')
+    edit_message_text = governed('edit_message_text', edit=True)
+    edit_message_media = governed('edit_message_media', edit=True)
+    edit_message_reply_markup = governed('edit_message_reply_markup', edit=True)
+    send_video = governed('send_video', priority=True)
+    send_audio = governed('send_audio', priority=True)
+    send_document = governed('send_document', priority=True)
+    send_animation = governed('send_animation', priority=True)
+
+class GovernedTeleBot(GovernedMethods, telebot.TeleBot):
+    def __init__(self, token, governor, **kwargs):
+        super().__init__(token, **kwargs)
+        self.governor = governor
+
+    def call_api(self, name, *args, **kwargs):
+        return getattr(telebot.TeleBot, name)(self, *args, **kwargs)
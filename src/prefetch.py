@@ -0,0 +1,92 @@
+from collections import deque
+import logging, threading, time
+
+logger = logging.getLogger(__name__)
+
+class Prefetcher:
+    def __init__(self, workers, queue_size, max_age):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_age = max_age
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.owners = {}
+        self.pending = set()
+        self.threads = []
+        self.scheduled = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        with self.condition:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'prefetch-worker-{i}', daemon=True)
+                self.threads.append(thread)
+                thread.start()
+        logger.info(f"Started {self.workers} prefetch workers")
+
+    def schedule(self, owner, keys, fn):
+        if not self.threads:
+            self.start()
+        with self.condition:
+            state = self.owners.setdefault(owner, [set(), 0])
+            state[0] = set(keys)
+            for key in keys:
+                if key in self.pending:
+                    continue
+                if len(self.queue) >= self.queue_size:
+                    self.dropped += 1
+                    continue
+                self.queue.append((owner, key, fn, time.monotonic()))
+                self.pending.add(key)
+                state[1] += 1
+                self.scheduled += 1
+                self.condition.notify()
+            if not state[1]:
+                del self.owners[owner]
+
+    def cancel(self, owner):
+        with self.condition:
+            if owner in self.owners:
+                self.owners[owner][0] = set()
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                owner, key, fn, queued_at = self.queue.popleft()
+                state = self.owners[owner]
+                current = key in state[0] and time.monotonic() - queued_at <= self.max_age
+            try:
+                if current:
+                    fn(key)
+                    self.completed += 1
+                else:
+                    self.cancelled += 1
+            except Exception as e:
+                self.failed += 1
+                logger.debug(f"Prefetch of {key} for {owner} failed: {str(e)}")
+            finally:
+                with self.condition:
+                    self.pending.discard(key)
+                    state[1] -= 1
+                    if not state[1]:
+                        self.owners.pop(owner, None)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'workers': self.workers,
+                'queued': len(self.queue),
+                'owners': len(self.owners),
+                'scheduled': self.scheduled,
+                'dropped': self.dropped,
+                'cancelled': self.cancelled,
+                'completed': self.completed,
+                'failed': self.failed
+            }
@@ -0,0 +1,87 @@
+from cache import TTLCache
+import math, threading, time
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, cost=1):
+        if self.tokens >= cost:
+            return 0
+        return (cost - self.tokens) / self.rate
+
+class RateLimiter:
+    def __init__(self, name, limits, max_users=10000):
+        self.name = name
+        self.user_limit = limits.get('user')
+        self.premium_limit = limits.get('premium') or self.user_limit
+        self.global_bucket = self.make_bucket(limits.get('global'))
+        self.buckets = TTLCache(max_users, self.idle_ttl())
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.refunded = 0
+
+    @staticmethod
+    def make_bucket(limit):
+        if not limit or not limit.get('per_minute'):
+            return None
+        return TokenBucket(limit['per_minute'], limit['burst'])
+
+    def idle_ttl(self):
+        ttls = [60 * limit['burst'] / limit['per_minute'] for limit in (self.user_limit, self.premium_limit) if limit and limit.get('per_minute')]
+        return max(ttls, default=3600)
+
+    def acquire(self, user_key, premium=False, cost=1):
+        now = time.monotonic()
+        with self.lock:
+            key = (user_key, premium)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.make_bucket(self.premium_limit if premium else self.user_limit)
+            buckets = [b for b in (bucket, self.global_bucket) if b is not None]
+            for b in buckets:
+                b.refill(now)
+            wait = max((b.wait_time(cost) for b in buckets), default=0)
+            if wait:
+                self.rejected += 1
+                raise RateLimited(math.ceil(wait))
+            for b in buckets:
+                b.tokens -= cost
+            if bucket is not None:
+                self.buckets.set(key, bucket)
+            self.admitted += 1
+
+    def refund(self, user_key, premium=False, cost=1):
+        with self.lock:
+            bucket = self.buckets.get((user_key, premium))
+            for b in (bucket, self.global_bucket):
+                if b is not None:
+                    b.tokens = min(b.capacity, b.tokens + cost)
+            self.refunded += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'name': self.name,
+                'users': len(self.buckets),
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'refunded': self.refunded,
+                'global_tokens': round(self.global_bucket.tokens, 2) if self.global_bucket else None
+            }
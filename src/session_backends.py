@@ -0,0 +1,152 @@
+from formats import VideoFormat, AudioFormat
+import atexit, json, logging, os, sqlite3, threading, time, zlib
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT_KEYS = ('client',)
+
+def encode_value(value):
+    if isinstance(value, VideoFormat):
+        return {'_v': value.to_list()}
+    if isinstance(value, AudioFormat):
+        return {'_a': value.to_list()}
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def decode_object(obj):
+    if len(obj) == 1:
+        if '_v' in obj:
+            return VideoFormat(*obj['_v'])
+        if '_a' in obj:
+            return AudioFormat(*obj['_a'])
+    return obj
+
+def persistent_items(data):
+    return {key: value for key, value in data.items() if not str(key).startswith('_')}
+
+def serialize_session(session):
+    data = {key: persistent_items(value) if isinstance(value, dict) else value for key, value in persistent_items(session).items() if key not in TRANSIENT_KEYS}
+    return zlib.compress(json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=encode_value).encode('utf-8'))
+
+def deserialize_session(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'), object_hook=decode_object)
+
+class MemoryBackend:
+    def load(self, chat_id):
+        return None
+
+    def save(self, chat_id, session):
+        pass
+
+    def delete(self, chat_id):
+        pass
+
+    def flush(self):
+        pass
+
+    def stats(self):
+        return {'backend': 'memory'}
+
+class SQLiteBackend:
+    def __init__(self, path, flush_interval=1, ttl=None, read_only=False):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "chat_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.dirty = {}
+        self.deleted = set()
+        self.writes = 0
+        self.flushes = 0
+        self.bytes_written = 0
+        self.last_purge = 0
+        if read_only:
+            return
+        self.flusher = threading.Thread(target=self._flush_loop, name='session-flusher', daemon=True)
+        self.flusher.start()
+        atexit.register(self.flush)
+
+    def load(self, chat_id):
+        with self.db_lock:
+            row = self.conn.execute("SELECT data FROM sessions WHERE chat_id = ?", (str(chat_id),)).fetchone()
+        if not row:
+            return None
+        try:
+            return deserialize_session(row[0])
+        except Exception as e:
+            logger.error(f"Failed to restore session for chat {chat_id}: {e}")
+            return None
+
+    def save(self, chat_id, session):
+        if self.read_only:
+            return
+        with self.lock:
+            self.dirty[chat_id] = session
+            self.deleted.discard(chat_id)
+
+    def delete(self, chat_id):
+        if self.read_only:
+            return
+        with self.lock:
+            self.dirty.pop(chat_id, None)
+            self.deleted.add(chat_id)
+
+    def flush(self):
+        with self.flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with self.lock:
+            dirty, self.dirty = self.dirty, {}
+            deleted, self.deleted = self.deleted, set()
+        if not dirty and not deleted:
+            return
+        rows = []
+        now = time.time()
+        for chat_id, session in dirty.items():
+            try:
+                rows.append((str(chat_id), serialize_session(session), now))
+            except RuntimeError:
+                with self.lock:
+                    self.dirty.setdefault(chat_id, session)
+            except Exception as e:
+                logger.error(f"Failed to serialize session for chat {chat_id}: {e}")
+        with self.db_lock:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO sessions (chat_id, data, updated_at) VALUES (?, ?, ?)", rows)
+                self.conn.executemany("DELETE FROM sessions WHERE chat_id = ?", [(str(chat_id),) for chat_id in deleted])
+                if self.ttl and now - self.last_purge > self.ttl / 24:
+                    self.conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+                    self.last_purge = now
+        self.writes += len(rows)
+        self.flushes += 1
+        self.bytes_written += sum(len(row[1]) for row in rows)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Session flush failed: {e}")
+
+    def stats(self):
+        with self.db_lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            'backend': 'sqlite',
+            'stored': size,
+            'pending': len(self.dirty),
+            'writes': self.writes,
+            'flushes': self.flushes,
+            'bytes_written': self.bytes_written
+        }
@@ -0,0 +1,195 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from session_backends import MemoryBackend
+import logging, random, sys, threading, time
+
+logger = logging.getLogger(__name__)
+
+def is_processing_key(key):
+    return isinstance(key, str) and key.isdigit()
+
+def deep_sizeof(obj, seen=None):
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+class ChatSession(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        now = time.monotonic()
+        self.touched = {key: now for key in self.keys() if is_processing_key(key)}
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if key in self.touched:
+            self.touched[key] = time.monotonic()
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if is_processing_key(key):
+            self.touched[key] = time.monotonic()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.touched.pop(key, None)
+
+    def pop(self, key, *default):
+        self.touched.pop(key, None)
+        return super().pop(key, *default)
+
+    def expire(self, ttl, now):
+        expired = [key for key, touched_at in list(self.touched.items()) if now - touched_at > ttl]
+        for key in expired:
+            self.pop(key, None)
+        return len(expired)
+
+class SessionStore(MutableMapping):
+    size_sample = 64
+
+    def __init__(self, max_chats, chat_ttl, processing_ttl, sweep_interval=60, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.max_chats = max_chats
+        self.chat_ttl = chat_ttl
+        self.processing_ttl = processing_ttl
+        self.sweep_interval = sweep_interval
+        self.sessions = OrderedDict()
+        self.touched = {}
+        self.lock = threading.RLock()
+        self.last_sweep = time.monotonic()
+        self.evicted = 0
+        self.expired = 0
+        self.expired_processing = 0
+        self.restored = 0
+
+    def __getitem__(self, chat_id):
+        now = time.monotonic()
+        with self.lock:
+            self.maybe_sweep(now)
+            if chat_id not in self.sessions and not self.restore(chat_id):
+                raise KeyError(chat_id)
+            session = self.sessions[chat_id]
+            if now - self.touched[chat_id] > self.chat_ttl:
+                self.drop(chat_id)
+                self.backend.delete(chat_id)
+                self.expired += 1
+                raise KeyError(chat_id)
+            self.sessions.move_to_end(chat_id)
+            self.touched[chat_id] = now
+            self.backend.save(chat_id, session)
+            return session
+
+    def __setitem__(self, chat_id, session):
+        if not isinstance(session, ChatSession):
+            session = ChatSession(session)
+        now = time.monotonic()
+        with self.lock:
+            self.maybe_sweep(now)
+            self.sessions[chat_id] = session
+            self.sessions.move_to_end(chat_id)
+            self.touched[chat_id] = now
+            self.backend.save(chat_id, session)
+            self.evict()
+
+    def evict(self):
+        while len(self.sessions) > self.max_chats:
+            oldest = next(iter(self.sessions))
+            self.drop(oldest)
+            self.evicted += 1
+
+    def __delitem__(self, chat_id):
+        with self.lock:
+            if chat_id not in self.sessions:
+                raise KeyError(chat_id)
+            self.drop(chat_id)
+            self.backend.delete(chat_id)
+
+    def __contains__(self, chat_id):
+        with self.lock:
+            if chat_id not in self.sessions and not self.restore(chat_id):
+                return False
+            return time.monotonic() - self.touched[chat_id] <= self.chat_ttl
+
+    def restore(self, chat_id):
+        data = self.backend.load(chat_id)
+        if data is None:
+            return False
+        self.sessions[chat_id] = ChatSession(data)
+        self.touched[chat_id] = time.monotonic()
+        self.restored += 1
+        self.evict()
+        return chat_id in self.sessions
+
+    def reload(self, chat_id):
+        with self.lock:
+            if chat_id in self.sessions:
+                self.drop(chat_id)
+            return self.restore(chat_id)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.sessions))
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def drop(self, chat_id):
+        del self.sessions[chat_id]
+        del self.touched[chat_id]
+
+    def maybe_sweep(self, now):
+        if now - self.last_sweep >= self.sweep_interval:
+            self.sweep(now)
+
+    def sweep(self, now=None):
+        now = now or time.monotonic()
+        with self.lock:
+            self.last_sweep = now
+            for chat_id in [chat_id for chat_id, touched_at in self.touched.items() if now - touched_at > self.chat_ttl]:
+                self.drop(chat_id)
+                self.backend.delete(chat_id)
+                self.expired += 1
+            for session in self.sessions.values():
+                self.expired_processing += session.expire(self.processing_ttl, now)
+
+    def approx_bytes(self, sessions):
+        sample = random.sample(sessions, min(len(sessions), self.size_sample))
+        seen = set(id(session.get('client')) for session in sample)
+        sizes = []
+        for session in sample:
+            try:
+                sizes.append(deep_sizeof(session, seen))
+            except RuntimeError:
+                continue
+        return int(sum(sizes) / len(sizes) * len(sessions)) if sizes else 0
+
+    def stats(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            counters = {
+                'chats': len(sessions),
+                'max_chats': self.max_chats,
+                'processing': sum(len(session.touched) for session in sessions),
+                'evicted': self.evicted,
+                'expired': self.expired,
+                'expired_processing': self.expired_processing,
+                'restored': self.restored
+            }
+        counters['approx_bytes'] = self.approx_bytes(sessions)
+        counters['backend'] = self.backend.stats()
+        return counters
@@ -1,7 +1,67 @@
-from config import BOT_TOKEN, API_BASE_URL, ADMIN_API_KEY
-import telebot, yt_dlp_host_api
+from config import BOT_TOKEN, RUNTIME, ROLE, DEFAULT_LANGUAGE, LANG_DIR, LANG_RESCAN_INTERVAL, ASYNC_HANDLER_WORKERS, HTTP_POOL_SIZE, API_BASE_URL, ADMIN_API_KEY, MAX_GET_RESULT_RETRIES, TASK_POLL_MIN_DELAY, TASK_POLL_MAX_DELAY, TASK_POLL_BACKOFF, TASK_POLL_WORKERS, SESSION_MAX_CHATS, SESSION_TTL, SESSION_PROCESSING_TTL, SESSION_SWEEP_INTERVAL, SESSION_BACKEND, SESSION_DB_PATH, SESSION_FLUSH_INTERVAL, CLIENT_CACHE_SIZE, CLIENT_CACHE_TTL, MEMBERSHIP_CACHE_SIZE, MEMBERSHIP_CACHE_TTL, INFO_CACHE_SIZE, INFO_CACHE_TTL, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, PREFETCH_WORKERS, PREFETCH_QUEUE_SIZE, PREFETCH_MAX_AGE, FILE_ID_CACHE_PATH, DOWNLOAD_WORKERS, DOWNLOAD_QUEUE_SIZE, MAX_USER_JOBS, JOB_QUEUE_PATH, JOB_QUEUE_POLL_INTERVAL, JOB_LEASE_TIMEOUT, RATE_LIMITS, TELEGRAM_RATE_LIMITS, OUTBOUND_MAX_RETRIES, OUTBOUND_MAX_RETRY_AFTER, INLINE_DEBOUNCE, INLINE_WORKERS, INLINE_PENDING_TTL
+from cache import TTLCache, SingleFlight
+from debounce import Debouncer
+from file_cache import FileIdCache
+from jobs import JobExecutor
+from jobqueue import JobQueue
+from prefetch import Prefetcher
+from ratelimit import RateLimiter
+from outbound import OutboundGovernor, GovernedTeleBot
+from tasks import TaskWatcher
+from async_runtime import AsyncRuntime, AsyncBotBridge, AsyncTaskWatcher
+from sessions import SessionStore
+from i18n import Catalog
+from metrics import registry
+from session_backends import MemoryBackend, SQLiteBackend
+import yt_dlp_host_api
 
-user_data = {}
-bot = telebot.TeleBot(BOT_TOKEN)
+catalog = Catalog(LANG_DIR, DEFAULT_LANGUAGE, LANG_RESCAN_INTERVAL)
+if SESSION_BACKEND == 'sqlite' or ROLE != 'standalone':
+    session_backend = SQLiteBackend(SESSION_DB_PATH, SESSION_FLUSH_INTERVAL, SESSION_TTL, read_only=ROLE == 'worker')
+else:
+    session_backend = MemoryBackend()
+user_data = SessionStore(SESSION_MAX_CHATS, SESSION_TTL, SESSION_PROCESSING_TTL, SESSION_SWEEP_INTERVAL, session_backend)
+governor = OutboundGovernor(TELEGRAM_RATE_LIMITS, OUTBOUND_MAX_RETRIES, OUTBOUND_MAX_RETRY_AFTER)
+if RUNTIME == 'async':
+    runtime = AsyncRuntime(ASYNC_HANDLER_WORKERS, HTTP_POOL_SIZE)
+    bot = AsyncBotBridge(BOT_TOKEN, governor, runtime)
+else:
+    runtime = None
+    bot = GovernedTeleBot(BOT_TOKEN, governor)
 api = yt_dlp_host_api.api(API_BASE_URL)
 admin = api.get_client(ADMIN_API_KEY)
+client_cache = TTLCache(CLIENT_CACHE_SIZE, CLIENT_CACHE_TTL)
+membership_cache = TTLCache(MEMBERSHIP_CACHE_SIZE, MEMBERSHIP_CACHE_TTL)
+info_cache = TTLCache(INFO_CACHE_SIZE, INFO_CACHE_TTL)
+info_flights = SingleFlight()
+search_cache = TTLCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+search_flights = SingleFlight()
+inline_pending = TTLCache(INFO_CACHE_SIZE, INLINE_PENDING_TTL)
+inline_debouncer = Debouncer(INLINE_DEBOUNCE, INLINE_WORKERS)
+prefetcher = Prefetcher(PREFETCH_WORKERS, PREFETCH_QUEUE_SIZE, PREFETCH_MAX_AGE)
+file_id_cache = FileIdCache(FILE_ID_CACHE_PATH)
+job_registry = SingleFlight()
+if ROLE != 'standalone':
+    job_executor = JobQueue(JOB_QUEUE_PATH, DOWNLOAD_QUEUE_SIZE, MAX_USER_JOBS, JOB_QUEUE_POLL_INTERVAL, JOB_LEASE_TIMEOUT, session_backend.flush)
+else:
+    job_executor = JobExecutor(DOWNLOAD_WORKERS, DOWNLOAD_QUEUE_SIZE, MAX_USER_JOBS)
+if runtime:
+    task_watcher = AsyncTaskWatcher(runtime, TASK_POLL_MIN_DELAY, TASK_POLL_MAX_DELAY, TASK_POLL_BACKOFF, MAX_GET_RESULT_RETRIES)
+else:
+    task_watcher = TaskWatcher(TASK_POLL_MIN_DELAY, TASK_POLL_MAX_DELAY, TASK_POLL_BACKOFF, MAX_GET_RESULT_RETRIES, TASK_POLL_WORKERS)
+download_limiter = RateLimiter('download', RATE_LIMITS.get('download', {}))
+info_limiter = RateLimiter('info', RATE_LIMITS.get('info', {}))
+
+registry.collect('downvot_i18n', catalog.stats)
+registry.collect('downvot_sessions', user_data.stats, counters=('evicted', 'expired', 'expired_processing', 'restored', 'writes', 'flushes', 'bytes_written'))
+for name, cache in (('client', client_cache), ('membership', membership_cache), ('info', info_cache), ('search', search_cache), ('file_id', file_id_cache)):
+    registry.collect('downvot_cache', cache.stats, {'cache': name}, counters=('hits', 'misses'))
+for name, flights in (('info', info_flights), ('search', search_flights), ('job', job_registry)):
+    registry.collect('downvot_singleflight', flights.stats, {'flight': name}, counters=('started', 'merged'))
+registry.collect('downvot_jobs', job_executor.stats, {'role': ROLE}, counters=('completed', 'failed', 'requeued', 'lost'))
+registry.collect('downvot_tasks', task_watcher.stats, counters=('polls', 'completed', 'failed'))
+registry.collect('downvot_inline_debounce', inline_debouncer.stats, counters=('scheduled', 'superseded', 'fired'))
+registry.collect('downvot_prefetch', prefetcher.stats, counters=('scheduled', 'dropped', 'cancelled', 'completed', 'failed'))
+registry.collect('downvot_outbound', governor.stats, counters=('sent', 'coalesced', 'retried', 'throttled'))
+for limiter in (download_limiter, info_limiter):
+    registry.collect('downvot_ratelimit', limiter.stats, {'limiter': limiter.name}, counters=('admitted', 'rejected', 'refunded'))
@@ -0,0 +1,108 @@
+from telebot.apihelper import ApiTelegramException
+from telebot.types import Message
+from yt_dlp_host_api.exceptions import APIError
+from config import BOT_TOKEN, DOWNLOAD_CHUNK_SIZE, UPLOAD_TIMEOUT, TEMP_DIR
+from state import governor
+import telebot.apihelper
+import logging, tempfile, uuid
+import requests
+
+logger = logging.getLogger(__name__)
+
+session = requests.Session()
+
+class FileTooLarge(Exception):
+    pass
+
+class MultipartStream:
+    def __init__(self, fields, file_field, filename, file_obj, file_size, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.file_obj = file_obj
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        head = b''
+        for name, value in fields.items():
+            head += (
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'
+            ).encode('utf-8')
+        head += (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode('utf-8')
+        self.head = head
+        self.tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return len(self.head) + self.file_size + len(self.tail)
+
+    def __iter__(self):
+        yield self.head
+        self.file_obj.seek(0)
+        while True:
+            chunk = self.file_obj.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        yield self.tail
+
+def api_url(method):
+    if telebot.apihelper.API_URL:
+        return telebot.apihelper.API_URL.format(BOT_TOKEN, method)
+    return f"https://api.telegram.org/bot{BOT_TOKEN}/{method}"
+
+def download_result(task_result, max_size):
+    response = session.get(task_result.get_file_url(), headers=task_result.client.headers, stream=True)
+    with response:
+        if response.status_code != 200:
+            raise APIError(response.json().get('error', 'Unknown error'))
+        content_length = int(response.headers.get('Content-Length') or 0)
+        if content_length > max_size:
+            raise FileTooLarge(content_length)
+        file_obj = tempfile.TemporaryFile(dir=TEMP_DIR)
+        file_size = 0
+        try:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise FileTooLarge(file_size)
+                file_obj.write(chunk)
+        except Exception:
+            file_obj.close()
+            raise
+    file_obj.seek(0)
+    logger.info(f"Downloaded {file_size} bytes from {task_result.get_file_url()}")
+    return file_obj, file_size
+
+def post_method(method, data, headers=None, timeout=None):
+    response = session.post(api_url(method), data=data, headers=headers, timeout=timeout)
+    result = response.json()
+    if not result.get('ok'):
+        raise ApiTelegramException(method, response, result)
+    return Message.de_json(result['result'])
+
+def form_fields(chat_id, reply_markup, params):
+    fields = {'chat_id': chat_id}
+    for name, value in params.items():
+        if value is not None:
+            fields[name] = str(value).lower() if isinstance(value, bool) else value
+    if reply_markup is not None:
+        fields['reply_markup'] = reply_markup.to_json()
+    return fields
+
+def send_file(method, file_field, chat_id, file_obj, file_size, filename, reply_markup=None, **params):
+    body = MultipartStream(form_fields(chat_id, reply_markup, params), file_field, filename, file_obj, file_size)
+    return governor.call(lambda: post_method(
+        method,
+        body,
+        headers={'Content-Type': body.content_type},
+        timeout=(telebot.apihelper.CONNECT_TIMEOUT, UPLOAD_TIMEOUT)
+    ), chat_id, priority=True)
+
+def send_local_file(method, file_field, chat_id, path, reply_markup=None, **params):
+    fields = form_fields(chat_id, reply_markup, params)
+    fields[file_field] = f'file://{path}'
+    return governor.call(lambda: post_method(method, fields, timeout=(telebot.apihelper.CONNECT_TIMEOUT, UPLOAD_TIMEOUT)), chat_id, priority=True)
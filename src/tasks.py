@@ -0,0 +1,116 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from yt_dlp_host_api.exceptions import APIError
+from yt_dlp_host_api.task import TaskResult
+import heapq, itertools, logging, threading, time
+
+logger = logging.getLogger(__name__)
+
+class WatchedTask:
+    __slots__ = ('task', 'future', 'on_status', 'started', 'deadline', 'delay', 'interval', 'polls')
+
+    def __init__(self, task, on_status, delay, timeout, interval=None):
+        self.task = task
+        self.future = Future()
+        self.on_status = on_status
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.delay = delay
+        self.interval = interval
+        self.polls = 0
+
+class TaskWatcher:
+    def __init__(self, min_delay=1, max_delay=10, backoff=1.5, timeout=480, poll_workers=4):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.timeout = timeout
+        self.poll_workers = poll_workers
+        self.schedule = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.pool = None
+        self.reporter = None
+        self.thread = None
+        self.polls = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        with self.condition:
+            if self.thread:
+                return
+            self.pool = ThreadPoolExecutor(self.poll_workers, thread_name_prefix='task-poll')
+            self.reporter = ThreadPoolExecutor(self.poll_workers, thread_name_prefix='task-progress')
+            self.thread = threading.Thread(target=self._run, name='task-watcher', daemon=True)
+            self.thread.start()
+        logger.info(f"Started task watcher with {self.poll_workers} poll workers")
+
+    def clamp(self, delay):
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def watch(self, task, expected=0, on_status=None, timeout=None, interval=None):
+        if not self.thread:
+            self.start()
+        entry = WatchedTask(task, on_status, 0 if interval else self.clamp(expected / 2), timeout or self.timeout, interval)
+        self.push(entry, entry.delay)
+        return entry.future
+
+    def push(self, entry, delay):
+        with self.condition:
+            heapq.heappush(self.schedule, (time.monotonic() + delay, next(self.counter), entry))
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.schedule or self.schedule[0][0] > time.monotonic():
+                    self.condition.wait(self.schedule[0][0] - time.monotonic() if self.schedule else None)
+                now = time.monotonic()
+                due = []
+                while self.schedule and self.schedule[0][0] <= now:
+                    due.append(heapq.heappop(self.schedule)[2])
+            for entry in due:
+                self.pool.submit(self.poll, entry)
+
+    def poll(self, entry):
+        try:
+            status = entry.task.get_status()
+            entry.polls += 1
+            with self.condition:
+                self.polls += 1
+            if status['status'] == 'completed':
+                with self.condition:
+                    self.completed += 1
+                entry.future.set_result(TaskResult(entry.task.client, status))
+                return
+            if status['status'] == 'error':
+                raise APIError(f"Task failed: {status.get('error', 'Unknown error')}")
+            if status['status'] not in ['waiting', 'processing']:
+                raise APIError(f"Unknown task status: {status['status']}")
+            if time.monotonic() >= entry.deadline:
+                raise APIError(f"Task did not complete within the expected time (waited {int(time.monotonic() - entry.started)} seconds)")
+        except Exception as e:
+            with self.condition:
+                self.failed += 1
+            entry.future.set_exception(e)
+            return
+        if entry.on_status:
+            self.reporter.submit(self.report, entry, status, time.monotonic() - entry.started)
+        entry.delay = entry.interval or self.clamp(entry.delay * self.backoff)
+        self.push(entry, entry.delay)
+
+    @staticmethod
+    def report(entry, status, elapsed):
+        try:
+            entry.on_status(status, elapsed)
+        except Exception as e:
+            logger.warning(f"Progress update for task {entry.task.task_id} failed: {str(e)}")
+
+    def stats(self):
+        with self.condition:
+            return {
+                'watching': len(self.schedule),
+                'polls': self.polls,
+                'completed': self.completed,
+                'failed': self.failed
+            }
@@ -1,17 +1,26 @@
 from functools import wraps
-from config import load_config, AUTO_CREATE_KEY, AUTO_ALLOWED_CHANNEL, DEFAULT_LANGUAGE, LANGUAGES, MAX_GET_RESULT_RETRIES, MAX_TELEGRAM_FILE_SIZE
-from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, Message, CallbackQuery, InputMediaPhoto
+from config import config_store, AUTO_CREATE_KEY, AUTO_ALLOWED_CHANNEL, DEFAULT_LANGUAGE, TASK_EXPECTED_THROUGHPUT, TASK_PROGRESS_INTERVAL, MAX_TELEGRAM_FILE_SIZE, LOCAL_BOT_API, LOCAL_FILES_PATH_MAP, MEMBERSHIP_POSITIVE_TTL, MEMBERSHIP_NEGATIVE_TTL, MEMBERSHIP_STALE_TTL, INFO_CACHE_TTL, INFO_CACHE_LIVE_TTL, INFO_POLL_INTERVAL, MAX_SEARCH_RESULTS, PREFETCH_ENABLED, INLINE_CACHE_TIME, INLINE_CACHE_CHAT
+from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, Message, CallbackQuery, InputMediaPhoto, InlineQueryResultArticle, InlineQueryResultCachedVideo, InlineQueryResultCachedAudio, InlineQueryResultCachedDocument, InputTextMessageContent
+from telebot.apihelper import ApiTelegramException
 from yt_dlp_host_api.exceptions import APIError
-from state import user_data, bot, admin, api
-from urllib.parse import urlparse, parse_qs
-import logging, io, re, json
-import math
+from state import catalog, user_data, bot, admin, api, client_cache, membership_cache, info_cache, info_flights, search_cache, search_flights, inline_pending, inline_debouncer, prefetcher, file_id_cache, job_registry, job_executor, task_watcher, download_limiter, info_limiter
+from jobs import QueueFull, UserLimitReached
+from ratelimit import RateLimited
+from urllib.parse import urlparse, parse_qs, unquote
+import logging, os, re, json, threading, time
+import streaming
+from formats import normalize_info
+from metrics import requests_total, auth_seconds, info_seconds, search_seconds, stage_seconds, jobs_total, bytes_total
+from youtube_search import YoutubeSearch
 
 logger = logging.getLogger(__name__)
+membership_refreshing = set()
+membership_lock = threading.Lock()
 
 VIDEO_FORMATS = ['mp4', 'mkv', 'webm', 'avi', 'mov', 'flv', 'gif']
 AUDIO_FORMATS = ['mp3', 'm4a', 'opus', 'flac', 'wav', 'aac', 'ogg']
 MAX_GIF_SIZE = 10 * 1024 * 1024
+INFO_FIELDS = ['qualities', 'title', 'thumbnail', 'is_live', 'duration', 'language']
 LANGUAGE_NAMES = {
     'en': 'English',
     'ru': 'Русский',
@@ -34,10 +43,7 @@ LANGUAGE_NAMES = {
 }
 
 def get_string(key, lang_code=DEFAULT_LANGUAGE):
-    if not lang_code in LANGUAGES: lang_code = DEFAULT_LANGUAGE
-    if not key in LANGUAGES[lang_code]: lang_code = DEFAULT_LANGUAGE
-    if not key in LANGUAGES[lang_code]: return key
-    return LANGUAGES[lang_code][key]
+    return catalog.get(key, lang_code)
 
 def format_duration(seconds):
     if not seconds:
@@ -71,11 +77,58 @@ def estimate_gif_size(width: int,
     return int(uncompressed * compression_ratio)
 
 def user_can_get_link(username: str) -> bool:
-    return username in load_config()['PREMIUM_USERS']
+    return config_store.is_premium(username)
+
+def get_user_client(username):
+    key_name = f'{username}_downvot'
+    client = client_cache.get(key_name)
+    if client is None:
+        client = api.get_client(admin.get_key(key_name))
+        client_cache.set(key_name, client)
+    return client
+
+def fetch_channel_membership(user_id):
+    member = bot.get_chat_member(chat_id=AUTO_ALLOWED_CHANNEL, user_id=user_id)
+    is_member = member.status in ['member', 'administrator', 'creator']
+    membership_cache.set(user_id, (is_member, time.monotonic()))
+    return is_member
+
+def refresh_channel_membership(user_id):
+    try:
+        fetch_channel_membership(user_id)
+    except Exception as e:
+        logger.error(f"Background membership refresh failed for user {user_id}: {str(e)}")
+    finally:
+        with membership_lock:
+            membership_refreshing.discard(user_id)
+
+def check_channel_membership(user_id):
+    entry = membership_cache.get(user_id)
+    if entry:
+        is_member, checked_at = entry
+        age = time.monotonic() - checked_at
+        ttl = MEMBERSHIP_POSITIVE_TTL if is_member else MEMBERSHIP_NEGATIVE_TTL
+        if age < ttl:
+            return is_member
+        if age < ttl + MEMBERSHIP_STALE_TTL:
+            with membership_lock:
+                start_refresh = user_id not in membership_refreshing
+                membership_refreshing.add(user_id)
+            if start_refresh:
+                threading.Thread(target=refresh_channel_membership, args=(user_id,), daemon=True).start()
+            return is_member
+    try:
+        return fetch_channel_membership(user_id)
+    except Exception as e:
+        if entry:
+            logger.warning(f"Membership check failed for user {user_id}, using last known status: {str(e)}")
+            return entry[0]
+        raise
 
 def authorized_users_only(func):
     @wraps(func)
     def wrapper(message):
+        started = time.perf_counter()
         if isinstance(message, Message):
             username = str(message.from_user.username)
             chat_id = message.chat.id
@@ -87,31 +140,30 @@ def authorized_users_only(func):
             return
         
         logger.info(f"Authorizing user: {username}")
-        CHAT_MEMBER = username in load_config()['ALLOWED_USERS']
+        CHAT_MEMBER = config_store.is_allowed(username)
 
         if chat_id not in user_data: 
             user_data[chat_id] = {}
             user_data[chat_id]['language'] = message.from_user.language_code
-            user_data[chat_id]['is_premium'] = user_can_get_link(username)
             logger.info(f"New user data created for {username}")
         
         if AUTO_ALLOWED_CHANNEL and not CHAT_MEMBER:
             try:
-                member = bot.get_chat_member(chat_id=AUTO_ALLOWED_CHANNEL, user_id=message.from_user.id)
-                if member.status in ['member', 'administrator', 'creator']:
-                    CHAT_MEMBER = True
+                CHAT_MEMBER = check_channel_membership(message.from_user.id)
+                if CHAT_MEMBER:
                     logger.info(f"User {username} authorized via channel membership")
                 else:
-                    CHAT_MEMBER = False
                     logger.info(f"User {username} not a member of the allowed channel")
             except Exception as e:
                 logger.error(f"Error checking channel membership for user {username}: {str(e)}")
                 bot.reply_to(message, get_string('processing_error', user_data[chat_id]['language']).format(error=str(e)), parse_mode='HTML')
         
+        auth_seconds.observe(time.perf_counter() - started)
+        requests_total.inc(result='allowed' if CHAT_MEMBER else 'denied')
         if CHAT_MEMBER:
             try:
                 user_data[chat_id]['username'] = message.from_user.username
-                user_data[chat_id]['client'] = api.get_client(admin.get_key(f'{message.from_user.username}_downvot'))
+                user_data[chat_id]['client'] = get_user_client(message.from_user.username)
                 logger.info(f"User {username} successfully authorized")
                 return func(message)
             except APIError as e:
@@ -123,6 +175,7 @@ def authorized_users_only(func):
                         admin.create_key(f'{message.from_user.username}_downvot', ["get_video", "get_audio", "get_live_video", "get_live_audio", "get_info"])
                         logger.info(f"Key created successfully for user {username}")
                         bot.send_message(chat_id, get_string('key_created', user_data[chat_id]['language']), parse_mode='HTML')
+                        user_data[chat_id]['client'] = get_user_client(message.from_user.username)
                         return func(message)
                     except APIError as e:
                         logger.error(f"Error creating key for user {username}: {str(e)}")
@@ -168,7 +221,240 @@ def detect_source(url):
         return 'YouTube', cleaned_url
     return None, url
 
+def get_video_info(client, url, chat_id=None, username=None):
+    _, cache_key = detect_source(url)
+    info = info_cache.get(cache_key)
+    if info is not None:
+        return info
+    if chat_id is not None:
+        info_limiter.acquire(chat_id, config_store.is_premium(username))
+
+    def load_info():
+        info = info_cache.get(cache_key)
+        if info is None:
+            logger.info(f"Fetching video info for {cache_key}")
+            with info_seconds.time():
+                info = normalize_info(task_watcher.watch(client.send_task.get_info(url=cache_key), interval=INFO_POLL_INTERVAL).result().get_json(INFO_FIELDS))
+            info_cache.set(cache_key, info, INFO_CACHE_LIVE_TTL if info.get('is_live') else None)
+        return info
+
+    return info_flights.do(cache_key, load_info)
+
+def normalize_query(query):
+    return ' '.join(query.split()).casefold()
+
+def get_search_results(query):
+    query = normalize_query(query)
+    results = search_cache.get(query)
+    if results is not None:
+        return results
+
+    def load_results():
+        results = search_cache.get(query)
+        if results is None:
+            logger.info(f"Searching YouTube for '{query}'")
+            with search_seconds.time():
+                results = tuple(
+                    {'title': result['title'], 'url_suffix': result['url_suffix'], 'thumbnail': result['thumbnails'][0]}
+                    for result in YoutubeSearch(query, max_results=MAX_SEARCH_RESULTS).to_dict()
+                )
+            if results:
+                search_cache.set(query, results)
+        return results
+
+    return search_flights.do(query, load_results)
+
+def search_result_url(result):
+    video_id_match = re.search(r'[?&]v=([^&]+)', result['url_suffix'])
+    if video_id_match:
+        return f"https://www.youtube.com/watch?v={video_id_match.group(1)}"
+    return f"https://www.youtube.com{result['url_suffix']}"
+
+def prefetch_search_results(chat_id, results, index):
+    client = user_data[chat_id].get('client')
+    if not client:
+        return
+    urls = []
+    for result in results[index:index + 2]:
+        _, cleaned_url = detect_source(search_result_url(result))
+        if cleaned_url and cleaned_url not in info_cache:
+            urls.append(cleaned_url)
+    prefetcher.schedule(chat_id, urls, lambda url: get_video_info(client, url))
+
+def build_caption(lang_code, url, info, file_type, video_format_info, audio_format_info, start_time=None, end_time=None):
+    if file_type == 'video':
+        caption = get_string('download_complete_video', lang_code).format(url=url, title=info['title'], video_quality=f"{video_format_info.height}p{video_format_info.fps}", audio_quality=f"{audio_format_info.abr}kbps")
+    else:
+        caption = get_string('download_complete_audio', lang_code).format(url=url, title=info['title'], audio_quality=f"{audio_format_info.abr}kbps")
+    if start_time or end_time: caption += "\n"+get_string('download_fragment', lang_code).format(start_time=start_time, end_time=end_time)
+    return caption
+
+def file_cache_key(url, file_type, video_format, audio_format, output_format, start_time, end_time, force_keyframes):
+    if file_type != 'video':
+        video_format = None
+    return json.dumps([url, file_type, video_format, audio_format, output_format, start_time, end_time, bool(force_keyframes)])
+
+def request_cache_key(processing_data):
+    if processing_data['file_info']['is_live']:
+        return None
+    file_type = processing_data['file_type']
+    start_time = processing_data.get('start_time', None)
+    end_time = processing_data.get('end_time', None)
+    return file_cache_key(
+        processing_data['url'], file_type, processing_data['video_format'], processing_data['audio_format'],
+        processing_data.get('output_format', 'mp4' if file_type == 'video' else 'mp3'),
+        start_time and format_duration(start_time), end_time and format_duration(end_time), processing_data.get('force_keyframes', False)
+    )
+
+def remember_file_id(cache_key, sent_message, file_url=None):
+    if not cache_key or sent_message is None:
+        return
+    for kind in ('animation', 'video', 'audio', 'document'):
+        media = getattr(sent_message, kind, None)
+        if media:
+            file_id_cache.set(cache_key, kind, media.file_id, file_url)
+            return
+
+def send_cached_file(chat_id, cache_key, caption, username=None, file_url=None):
+    cached = file_id_cache.get(cache_key)
+    if not cached:
+        return False
+    kind, file_id, cached_url = cached
+    file_url = file_url or cached_url
+    reply_markup = file_link_keyboard(user_data[chat_id]['language'], file_url, bool(file_url) and user_can_get_link(username))
+    try:
+        if kind == 'video':
+            bot.send_video(chat_id, file_id, caption=caption, supports_streaming=True, parse_mode='HTML', reply_markup=reply_markup)
+        elif kind == 'animation':
+            bot.send_animation(chat_id, file_id, caption=caption, parse_mode='HTML', reply_markup=reply_markup)
+        elif kind == 'audio':
+            bot.send_audio(chat_id, file_id, caption=caption, parse_mode='HTML', reply_markup=reply_markup)
+        else:
+            bot.send_document(chat_id, file_id, caption=caption, parse_mode='HTML', reply_markup=reply_markup)
+        return True
+    except ApiTelegramException as e:
+        logger.warning(f"Cached file_id rejected by Telegram, dropping it: {str(e)}")
+        file_id_cache.delete(cache_key)
+        return False
+
+def submit_task(client, job):
+    url = job['url']
+    if job['live']:
+        if job['file_type'] == 'video':
+            return client.send_task.get_live_video(url=url, duration=job['duration'], video_format=job['video_format'], audio_format=job['audio_format'], output_format=job['output_format'])
+        return client.send_task.get_live_audio(url=url, duration=job['duration'], audio_format=job['audio_format'], output_format=job['output_format'])
+    if job['file_type'] == 'video':
+        return client.send_task.get_video(url=url, video_format=job['video_format'], audio_format=job['audio_format'], output_format=job['output_format'], start_time=job['start_time'], end_time=job['end_time'], force_keyframes=job['force_keyframes'])
+    return client.send_task.get_audio(url=url, audio_format=job['audio_format'], output_format=job['output_format'], start_time=job['start_time'], end_time=job['end_time'], force_keyframes=job['force_keyframes'])
+
+def local_file_path(task_result):
+    file_path = unquote(task_result.status['file'])
+    for prefix, local_dir in LOCAL_FILES_PATH_MAP.items():
+        if file_path.startswith(prefix):
+            return os.path.join(local_dir, file_path[len(prefix):].lstrip('/'))
+    return None
+
+def result_filename(info, job):
+    filename = re.sub(r'[^a-zA-ZÀ-žа-яА-ЯёЁ0-9;_ ]', '', info['title'][:48])
+    filename = re.sub(r'\s+', '_', filename) + f'_DownVot'
+    if job['file_type'] == 'video':
+        return filename + f"_{job['video_format_info'].height}p{job['video_format_info'].fps}.{job['output_format']}"
+    return filename + f"_{job['audio_format_info'].abr}kbps.{job['output_format']}"
+
+def deliver_result(chat_id, processing_message_id, task_result, job):
+    lang_code = user_data[chat_id]['language']
+    username = job['username']
+    info = job['info']
+    file_type = job['file_type']
+    output_format = job['output_format']
+    total_size = job['total_size']
+    caption = job['caption']
+    link_allowed = user_can_get_link(username)
+    file_url = task_result.get_file_url()
+
+    max_file_size = MAX_TELEGRAM_FILE_SIZE
+    file_size_out_of_range = False
+    file_obj = None
+    local_path = local_file_path(task_result) if LOCAL_BOT_API else None
+    if total_size > max_file_size:
+        file_size_out_of_range = True
+    elif local_path:
+        try:
+            file_size = os.path.getsize(local_path)
+        except OSError:
+            file_size = total_size
+        file_size_out_of_range = file_size > max_file_size
+    else:
+        try:
+            with stage_seconds.time(stage='download'):
+                file_obj, file_size = streaming.download_result(task_result, max_file_size)
+            bytes_total.inc(file_size, direction='download')
+        except streaming.FileTooLarge as e:
+            logger.info(f"Downloaded file for user {username} exceeds limit: {e.args[0]} bytes")
+            file_size_out_of_range = True
+
+    try:
+        if output_format == 'gif' and not file_size_out_of_range:
+            actual_size = file_size if file_obj or local_path else total_size
+            if actual_size > MAX_GIF_SIZE:
+                bot.edit_message_text(get_string('gif_too_large', lang_code), chat_id, processing_message_id)
+                return
+
+        if file_size_out_of_range:
+            if not link_allowed:
+                bot.send_message(chat_id, get_string('no_access_link', lang_code))
+                return
+            logger.info(f"File size exceeds limit for user {username}. Sending download link.")
+            if file_type == 'video': 
+                bot.send_photo(chat_id, info['thumbnail'], caption=caption, parse_mode='HTML', reply_markup=file_link_keyboard(lang_code, file_url, link_allowed))
+            else: 
+                bot.send_message(chat_id, caption, parse_mode='HTML', reply_markup=file_link_keyboard(lang_code, file_url, link_allowed))
+            return
+
+        logger.info(f"Preparing to send file for user {username}")
+        filename = result_filename(info, job)
+
+        if file_type == 'video' and output_format == 'gif':
+            method, file_field, params = 'sendAnimation', 'animation', {}
+        elif file_type == 'video':
+            method, file_field, params = 'sendVideo', 'video', {'supports_streaming': True}
+        else:
+            method, file_field, params = 'sendAudio', 'audio', {}
+        reply_markup = file_link_keyboard(lang_code, file_url, link_allowed)
+        if local_path:
+            logger.info(f"Sending local file '{local_path}' to user {username}")
+            with stage_seconds.time(stage='upload'):
+                sent_message = streaming.send_local_file(method, file_field, chat_id, local_path, caption=caption, parse_mode='HTML', reply_markup=reply_markup, **params)
+        else:
+            logger.info(f"Sending file '{filename}' ({file_size} bytes) to user {username}")
+            with stage_seconds.time(stage='upload'):
+                sent_message = streaming.send_file(method, file_field, chat_id, file_obj, file_size, filename, caption=caption, parse_mode='HTML', reply_markup=reply_markup, **params)
+            bytes_total.inc(file_size, direction='upload')
+    finally:
+        if file_obj:
+            file_obj.close()
+    remember_file_id(job['cache_key'], sent_message, file_url)
+
+def expected_task_time(job):
+    if job['live']:
+        return job['duration']
+    return job['total_size'] / TASK_EXPECTED_THROUGHPUT
+
+def progress_updater(chat_id, processing_message_id):
+    lang_code = user_data[chat_id]['language']
+    last_update = [time.monotonic()]
+
+    def update(status, elapsed):
+        now = time.monotonic()
+        if now - last_update[0] < TASK_PROGRESS_INTERVAL:
+            return
+        last_update[0] = now
+        bot.edit_message_text(get_string('task_progress', lang_code).format(status=get_string(f"task_{status['status']}", lang_code), elapsed=int(elapsed)), chat_id, processing_message_id)
+
+    return update
+
 def process_request(chat_id, processing_message_id):
+    labels = {}
     try:
         logger.info(f"Starting request processing for user {chat_id}, message ID: {processing_message_id}")
         processing_data = user_data[chat_id][processing_message_id]
@@ -178,102 +464,87 @@ def process_request(chat_id, processing_message_id):
         video_format = processing_data['video_format']
         audio_format = processing_data['audio_format']
         output_format = processing_data.get('output_format', 'mp4' if file_type == 'video' else 'mp3')
-        total_size = processing_data['total_size']
         username = user_data[chat_id]['username']
         info = processing_data['file_info']
         client = user_data[chat_id]['client']
         start_time = processing_data.get('start_time', None)
         end_time = processing_data.get('end_time', None)
         force_keyframes = processing_data.get('force_keyframes', False)
-        link_allowed = user_can_get_link(username)
 
         if start_time: start_time = format_duration(start_time)
         if end_time: end_time = format_duration(end_time)
+        labels = {'file_type': file_type, 'output_format': output_format}
 
         logger.info(f"Request details for user {username}: file_type={file_type}, video_format={video_format}, audio_format={audio_format}, output_format={output_format}, duration={duration}")
 
         video_format_info = info['qualities']["video"][video_format] if file_type == 'video' else None
         audio_format_info = info['qualities']["audio"][audio_format]
-        
-        if info['is_live'] and not user_data[chat_id].get('is_premium', False):
-            if file_type == 'video':
-                task = client.send_task.get_live_video(url=url, duration=duration, video_format=video_format, audio_format=audio_format, output_format=output_format)
-            else:
-                task = client.send_task.get_live_audio(url=url, duration=duration, audio_format=audio_format, output_format=output_format)
-        elif file_type == 'video':
-            task = client.send_task.get_video(url=url, video_format=video_format, audio_format=audio_format, output_format=output_format, start_time=start_time, end_time=end_time, force_keyframes=force_keyframes)
-        else:
-            task = client.send_task.get_audio(url=url, audio_format=audio_format, output_format=output_format, start_time=start_time, end_time=end_time, force_keyframes=force_keyframes)
+        caption = build_caption(user_data[chat_id]['language'], url, info, file_type, video_format_info, audio_format_info, start_time, end_time)
 
-        bot.edit_message_text(get_string('processing_request', user_data[chat_id]['language']), chat_id, processing_message_id)
-        
-        logger.info(f"Waiting for task result for user {username}")
-        task_result = task.get_result(max_retries=MAX_GET_RESULT_RETRIES)
-        file_url = task_result.get_file_url()
-        
-        max_file_size = MAX_TELEGRAM_FILE_SIZE
-        file_size_out_of_range = False
-        if total_size > max_file_size:
-            file_size_out_of_range = True
-        else:
-            file_obj = io.BytesIO(task_result.get_file())
-            file_size = file_obj.getbuffer().nbytes
-            if file_size > max_file_size:
-                file_size_out_of_range = True
-        
-        if output_format == 'gif' and not file_size_out_of_range:
-            actual_size = file_size if 'file_obj' in locals() else total_size
-            if actual_size > MAX_GIF_SIZE:
-                bot.edit_message_text(get_string('gif_too_large', user_data[chat_id]['language']), chat_id, processing_message_id)
+        cache_key = request_cache_key(processing_data)
+        if cache_key:
+            if send_cached_file(chat_id, cache_key, caption, username):
+                logger.info(f"Served cached file for user {username}")
+                jobs_total.inc(result='cached', **labels)
                 bot.send_message(chat_id, get_string('more_requests', user_data[chat_id]['language']))
                 return
 
-        if file_size_out_of_range:
-            if not link_allowed:
-                bot.send_message(chat_id, get_string('no_access_link', user_data[chat_id]['language']))
-                return
-            logger.info(f"File size exceeds limit for user {username}. Sending download link.")
-            if file_type == 'video': 
-                message = get_string('download_complete_video', user_data[chat_id]['language'])
-                caption = message.format(url=url, title=info['title'], video_quality=f"{video_format_info['height']}p{video_format_info['fps']}", audio_quality=f"{audio_format_info['abr']}kbps")
-                if start_time or end_time: caption += "\n"+get_string('download_fragment', user_data[chat_id]['language']).format(start_time=start_time, end_time=end_time)
-                bot.send_photo(chat_id, info['thumbnail'], caption=caption, parse_mode='HTML', reply_markup=file_link_keyboard(user_data[chat_id]['language'], file_url, link_allowed))
-            else: 
-                message = get_string('download_complete_audio', user_data[chat_id]['language'])
-                caption = message.format(url=url, title=info['title'], audio_quality=f"{audio_format_info['abr']}kbps")
-                if start_time or end_time: caption += "\n"+get_string('download_fragment', user_data[chat_id]['language']).format(start_time=start_time, end_time=end_time)
-                bot.send_message(chat_id, caption, parse_mode='HTML', reply_markup=file_link_keyboard(user_data[chat_id]['language'], file_url, link_allowed))
+        job = {
+            'url': url,
+            'file_type': file_type,
+            'live': info['is_live'] and not config_store.is_premium(username),
+            'duration': duration,
+            'video_format': video_format,
+            'audio_format': audio_format,
+            'output_format': output_format,
+            'start_time': start_time,
+            'end_time': end_time,
+            'force_keyframes': force_keyframes,
+            'total_size': processing_data['total_size'],
+            'username': username,
+            'info': info,
+            'video_format_info': video_format_info,
+            'audio_format_info': audio_format_info,
+            'caption': caption,
+            'cache_key': cache_key
+        }
+
+        bot.edit_message_text(get_string('processing_request', user_data[chat_id]['language']), chat_id, processing_message_id)
+
+        delivery_errors = []
+        def run_task():
+            with stage_seconds.time(stage='submit'):
+                task = submit_task(client, job)
+            logger.info(f"Waiting for task result for user {username}")
+            with stage_seconds.time(stage='wait'):
+                task_result = task_watcher.watch(task, expected_task_time(job), progress_updater(chat_id, processing_message_id)).result()
+            try:
+                deliver_result(chat_id, processing_message_id, task_result, job)
+            except Exception as e:
+                delivery_errors.append(e)
+            return task_result
+
+        if cache_key:
+            task_result, leader = job_registry.run(cache_key, run_task)
         else:
-            logger.info(f"Preparing to send file for user {username}")
-            filename = re.sub(r'[^a-zA-ZÀ-žа-яА-ЯёЁ0-9;_ ]', '', info['title'][:48])
-            filename = re.sub(r'\s+', '_', filename) + f'_DownVot'
-            if file_type == 'video': 
-                filename += f"_{video_format_info['height']}p{video_format_info['fps']}.{output_format}"
-            else: 
-                filename += f"_{audio_format_info['abr']}kbps.{output_format}"
-            file_obj.name = filename
+            task_result, leader = run_task(), True
 
-            logger.info(f"Sending file '{filename}' to user {username}")
-            if file_type == 'video': 
-                message = get_string('download_complete_video', user_data[chat_id]['language'])
-                caption = message.format(url=url, title=info['title'], video_quality=f"{video_format_info['height']}p{video_format_info['fps']}", audio_quality=f"{audio_format_info['abr']}kbps")
-                if start_time or end_time: caption += "\n"+get_string('download_fragment', user_data[chat_id]['language']).format(start_time=start_time, end_time=end_time)
-                
-                if output_format == 'gif':
-                    bot.send_animation(chat_id, file_obj, caption=caption, parse_mode='HTML', reply_markup=file_link_keyboard(user_data[chat_id]['language'], file_url, link_allowed))
-                else:
-                    bot.send_video(chat_id, file_obj, caption=caption, supports_streaming=True, parse_mode='HTML', reply_markup=file_link_keyboard(user_data[chat_id]['language'], file_url, link_allowed))
-            else: 
-                message = get_string('download_complete_audio', user_data[chat_id]['language'])
-                caption = message.format(url=url, title=info['title'], audio_quality=f"{audio_format_info['abr']}kbps")
-                if start_time or end_time: caption += "\n"+get_string('download_fragment', user_data[chat_id]['language']).format(start_time=start_time, end_time=end_time)
-                bot.send_audio(chat_id, file_obj, caption=caption, parse_mode='HTML', reply_markup=file_link_keyboard(user_data[chat_id]['language'], file_url, link_allowed))
+        if leader:
+            if delivery_errors:
+                raise delivery_errors[0]
+        else:
+            logger.info(f"Request for user {username} merged into an in-flight task ({job_registry.stats()['merged']} merged so far)")
+            if not send_cached_file(chat_id, cache_key, caption, username, task_result.get_file_url()):
+                deliver_result(chat_id, processing_message_id, task_result, job)
         logger.info(f"Request processing completed successfully for user {username}")
+        jobs_total.inc(result='delivered' if leader else 'merged', **labels)
     except APIError as e:
         logger.error(f"API Error for user {chat_id}: {str(e)}")
+        jobs_total.inc(result='error', **labels)
         bot.send_message(chat_id, get_string('processing_error', user_data[chat_id]['language']).format(error=str(e)), parse_mode='HTML')
     except Exception as e:
         logger.error(f"Error processing request for user {chat_id}: {str(e)}")
+        jobs_total.inc(result='error', **labels)
         bot.send_message(chat_id, get_string('processing_error', user_data[chat_id]['language']).format(error=str(e)), parse_mode='HTML')
     finally:
         if processing_message_id in user_data.get(chat_id, {}):
@@ -284,6 +555,39 @@ def process_request(chat_id, processing_message_id):
             del user_data[chat_id][processing_message_id]
     bot.send_message(chat_id, get_string('more_requests', user_data[chat_id]['language']))
 
+def enqueue_request(chat_id, processing_message_id, username=None):
+    lang_code = user_data[chat_id]['language']
+    premium = config_store.is_premium(username)
+    try:
+        download_limiter.acquire(chat_id, premium)
+        position = job_executor.submit(chat_id, process_request, chat_id, processing_message_id, key=request_cache_key(user_data[chat_id][processing_message_id]))
+    except RateLimited as e:
+        bot.send_message(chat_id, get_string('rate_limited', lang_code).format(seconds=e.retry_after))
+        return
+    except UserLimitReached as e:
+        download_limiter.refund(chat_id, premium)
+        bot.send_message(chat_id, get_string('too_many_jobs', lang_code).format(limit=e.args[0]))
+        return
+    except QueueFull:
+        download_limiter.refund(chat_id, premium)
+        bot.send_message(chat_id, get_string('queue_full', lang_code))
+        return
+    if position:
+        logger.info(f"Request for user {chat_id} queued at position {position}")
+        bot.edit_message_text(get_string('queued_position', lang_code).format(position=position), chat_id, processing_message_id)
+
+def release_job(name, args, error=None):
+    if name == 'prepare_inline':
+        if error:
+            logger.error(f"Worker failed inline preparation of {args[-1]} for user {args[1]}: {error}")
+        inline_pending.pop(args[-1])
+        return
+    chat_id, processing_message_id = args
+    if error:
+        logger.error(f"Worker failed request {processing_message_id} for user {chat_id}: {error}")
+    if chat_id in user_data:
+        user_data[chat_id].pop(processing_message_id, None)
+
 def create_key_step(message):
     try:
         chat_id = message.chat.id
@@ -309,6 +613,7 @@ def delete_key_step(message):
         client = user_data[chat_id]['client']
         try:
             client.delete_key(f"{user_to_delete}")
+            client_cache.pop(user_to_delete)
             bot.send_message(chat_id, get_string('key_deleted_successfully', user_data[chat_id]['language']).format(username=user_to_delete), parse_mode='HTML')
         except APIError as e:
             bot.send_message(chat_id, get_string('key_deletion_error', user_data[chat_id]['language']).format(error=str(e)), parse_mode='HTML')
@@ -316,13 +621,36 @@ def delete_key_step(message):
         logger.error(f"Error processing request for user {chat_id}: {str(e)}")
         bot.send_message(chat_id, get_string('processing_error', user_data[chat_id]['language']).format(error=str(e)), parse_mode='HTML')
 
-def type_keyboard(lang_code):
+def static_keyboard(keyboards, build, lang_code):
+    if lang_code not in catalog.files:
+        lang_code = DEFAULT_LANGUAGE
+    keyboard = keyboards.get(lang_code)
+    if keyboard is None:
+        keyboard = keyboards[lang_code] = build(lang_code)
+    return keyboard
+
+def cached_keyboard(chat_id, processing_message_id, key, build):
+    if chat_id is None:
+        return build()
+    cache = user_data[chat_id][processing_message_id].setdefault('_keyboards', {})
+    keyboard = cache.get(key)
+    if keyboard is None:
+        keyboard = cache[key] = build()
+    return keyboard
+
+def build_type_keyboard(lang_code):
     keyboard = InlineKeyboardMarkup()
     keyboard.row(InlineKeyboardButton(get_string('video_button', lang_code), callback_data="type_video"),
                  InlineKeyboardButton(get_string('audio_button', lang_code), callback_data="type_audio"))
     return keyboard
 
-def output_format_keyboard(file_type, lang_code, processing_message_id):
+def type_keyboard(lang_code):
+    return static_keyboard(TYPE_KEYBOARDS, build_type_keyboard, lang_code)
+
+def output_format_keyboard(file_type, lang_code, processing_message_id, chat_id=None):
+    return cached_keyboard(chat_id, processing_message_id, ('output_format', file_type, lang_code), lambda: build_output_format_keyboard(file_type, lang_code, processing_message_id))
+
+def build_output_format_keyboard(file_type, lang_code, processing_message_id):
     keyboard = InlineKeyboardMarkup()
     formats = VIDEO_FORMATS if file_type == 'video' else AUDIO_FORMATS
     format_strings = get_string('video_formats' if file_type == 'video' else 'audio_formats', lang_code)
@@ -341,6 +669,21 @@ def output_format_keyboard(file_type, lang_code, processing_message_id):
     return keyboard
 
 def quality_keyboard(qualities, chat_id, processing_message_id, selected_video=None, selected_audio=None):
+    processing_data = user_data[chat_id][processing_message_id]
+    key = (
+        'quality', processing_data['file_type'], processing_data.get('output_format'), selected_video, selected_audio,
+        processing_data.get('selected_audio_lang'), processing_data.get('start_time'), processing_data.get('end_time'),
+        config_store.is_premium(user_data[chat_id].get('username')), user_data[chat_id]['language']
+    )
+    cache = processing_data.setdefault('_keyboards', {})
+    entry = cache.get(key)
+    if entry is None:
+        keyboard = build_quality_keyboard(qualities, chat_id, processing_message_id, selected_video, selected_audio)
+        entry = cache[key] = (keyboard, processing_data.get('video_format'), processing_data.get('audio_format'), processing_data['total_size'])
+    keyboard, processing_data['video_format'], processing_data['audio_format'], processing_data['total_size'] = entry
+    return keyboard
+
+def build_quality_keyboard(qualities, chat_id, processing_message_id, selected_video=None, selected_audio=None):
     keyboard = InlineKeyboardMarkup()
     total_size = 0
     
@@ -358,14 +701,11 @@ def quality_keyboard(qualities, chat_id, processing_message_id, selected_video=N
 
     if output_format != 'gif':
         if user_data[chat_id][processing_message_id]['file_type'] == 'video':
-            if qualities["video"][default_video]["filesize"]:
-                total_size += qualities["video"][default_video]["filesize"]
-            elif qualities["video"][default_video].get("filesize_approx", 0):
-                total_size += qualities["video"][default_video]["filesize_approx"]
             video_format = qualities["video"][default_video]
-            dynamic_range = 'HDR' if video_format['dynamic_range'] == 'HDR10' else ''
+            total_size += video_format.size
+            dynamic_range = 'HDR' if video_format.hdr else ''
             keyboard.row(InlineKeyboardButton(
-                f"{get_string('video_quality', user_data[chat_id]['language'])} {video_format['height']}p{video_format['fps']} {dynamic_range}",
+                f"{get_string('video_quality', user_data[chat_id]['language'])} {video_format.height}p{video_format.fps} {dynamic_range}",
                 callback_data=f"select_video_quality_{processing_message_id}"
             ))
 
@@ -388,13 +728,10 @@ def quality_keyboard(qualities, chat_id, processing_message_id, selected_video=N
         default_audio = selected_audio
     
     if output_format != 'gif' and default_audio in qualities["audio"]:
-        if qualities["audio"][default_audio]["filesize"]:
-            total_size += qualities["audio"][default_audio]["filesize"]
-        elif qualities["audio"][default_audio].get("filesize_approx", 0):
-            total_size += qualities["audio"][default_audio]["filesize_approx"]
         audio_format = qualities["audio"][default_audio]
+        total_size += audio_format.size
         keyboard.row(InlineKeyboardButton(
-            f"{get_string('audio_quality', user_data[chat_id]['language'])} {audio_format['abr']}kbps",
+            f"{get_string('audio_quality', user_data[chat_id]['language'])} {audio_format.abr}kbps",
             callback_data=f"select_audio_quality_{processing_message_id}"
         ))
     
@@ -430,7 +767,7 @@ def quality_keyboard(qualities, chat_id, processing_message_id, selected_video=N
 
     if output_format == 'gif':
         vg_default = qualities["video"][default_video]
-        w_src, h_src = vg_default['width'], vg_default['height']
+        w_src, h_src = vg_default.width, vg_default.height
         if not w_src or not h_src:
             w_src, h_src = 1280, 720
         w_out = 720
@@ -445,34 +782,31 @@ def quality_keyboard(qualities, chat_id, processing_message_id, selected_video=N
     
     if output_format == 'gif' and total_size > MAX_GIF_SIZE:
         keyboard.row(InlineKeyboardButton(text="🚫 " + btn_text, callback_data='deny_gif_size'))
-    elif (total_size > MAX_TELEGRAM_FILE_SIZE) and (not user_data[chat_id].get('is_premium', False)):
+    elif (total_size > MAX_TELEGRAM_FILE_SIZE) and (not config_store.is_premium(user_data[chat_id].get('username'))):
         keyboard.row(InlineKeyboardButton(text="🚫 " + btn_text, callback_data='deny_bigfile'))
     else:
         keyboard.row(InlineKeyboardButton(btn_text, callback_data=f"quality_{processing_message_id}_{default_video}_{default_audio}"))
     
     return keyboard
 
-def video_quality_keyboard(qualities, processing_message_id):
+def video_quality_keyboard(qualities, processing_message_id, chat_id=None):
+    return cached_keyboard(chat_id, processing_message_id, ('video_quality',), lambda: build_video_quality_keyboard(qualities, processing_message_id))
+
+def build_video_quality_keyboard(qualities, processing_message_id):
     keyboard = InlineKeyboardMarkup()
     row = []
     unique_qualities = {}
     for quality, data in qualities["video"].items():
-        height = data['height']
-        fps = data['fps']
-        dynamic_range = 'HDR' if data['dynamic_range'] == 'HDR10' else 'SDR'
-        key = f'{height}p{fps}{dynamic_range}'
+        key = (data.height, data.fps, data.hdr)
         unique_qualities[key] = (quality, data)
     for key, (quality, data) in unique_qualities.items():
         if len(row) == 2:
             keyboard.row(*row)
             row = []
         
-        size = "≈?MB"
-        if data['filesize']: size = f"≈{round(data['filesize'] / (1024 * 1024), 1)}MB"
-        elif data.get('filesize_approx', 0): size = f"≈{round(data.get('filesize_approx', 0) / (1024 * 1024), 1)}MB"
-
-        dynamic_range = 'HDR' if data['dynamic_range'] == 'HDR10' else ''
-        label = f"{data['height']}p{data['fps']} {dynamic_range} {size}"
+        size = f"≈{round(data.size / (1024 * 1024), 1)}MB" if data.size else "≈?MB"
+        dynamic_range = 'HDR' if data.hdr else ''
+        label = f"{data.height}p{data.fps} {dynamic_range} {size}"
         row.append(InlineKeyboardButton(label, callback_data=f"video_quality_{quality}_{processing_message_id}"))
     if row:
         keyboard.row(*row)
@@ -480,6 +814,10 @@ def video_quality_keyboard(qualities, processing_message_id):
     return keyboard
 
 def audio_quality_keyboard(qualities, processing_message_id, chat_id=None):
+    selected_lang = user_data[chat_id][processing_message_id].get('selected_audio_lang') if chat_id else None
+    return cached_keyboard(chat_id, processing_message_id, ('audio_quality', selected_lang), lambda: build_audio_quality_keyboard(qualities, processing_message_id, chat_id))
+
+def build_audio_quality_keyboard(qualities, processing_message_id, chat_id=None):
     keyboard = InlineKeyboardMarkup()
     row = []
     
@@ -496,23 +834,17 @@ def audio_quality_keyboard(qualities, processing_message_id, chat_id=None):
     
     unique_qualities = {}
     for quality, data in filtered_audio.items():
-        abr = data['abr']
-        key = f'{abr}'
-        if key not in unique_qualities or data.get('filesize', 0) > unique_qualities[key][1].get('filesize', 0):
+        key = data.abr
+        if key not in unique_qualities or data.filesize > unique_qualities[key][1].filesize:
             unique_qualities[key] = (quality, data)
     
-    for key, (quality, data) in sorted(unique_qualities.items(), key=lambda x: x[1][1]['abr']):
+    for key, (quality, data) in sorted(unique_qualities.items(), key=lambda x: x[1][1].abr or 0):
         if len(row) == 2:
             keyboard.row(*row)
             row = []
         
-        size = "≈?MB"
-        if data['filesize']: 
-            size = f"≈{round(data['filesize'] / (1024 * 1024), 1)}MB"
-        elif data.get('filesize_approx', 0): 
-            size = f"≈{round(data.get('filesize_approx', 0) / (1024 * 1024), 1)}MB"
-        
-        label = f"{data['abr']}kbps {size}"
+        size = f"≈{round(data.size / (1024 * 1024), 1)}MB" if data.size else "≈?MB"
+        label = f"{data.abr}kbps {size}"
         row.append(InlineKeyboardButton(label, callback_data=f"audio_quality_{quality}_{processing_message_id}"))
     
     if row:
@@ -553,13 +885,16 @@ def audio_language_keyboard(audio_langs, selected_lang, processing_message_id, l
     keyboard.row(InlineKeyboardButton("←", callback_data=f"back_to_main_{processing_message_id}"))
     return keyboard
 
-def admin_keyboard(lang_code):
+def build_admin_keyboard(lang_code):
     keyboard = InlineKeyboardMarkup()
     keyboard.row(InlineKeyboardButton(get_string('create_key_button', lang_code), callback_data="admin_create_key"))
     keyboard.row(InlineKeyboardButton(get_string('delete_key_button', lang_code), callback_data="admin_delete_key"))
     return keyboard
 
-def duration_keyboard(lang_code, processing_message_id):
+def admin_keyboard(lang_code):
+    return static_keyboard(ADMIN_KEYBOARDS, build_admin_keyboard, lang_code)
+
+def build_duration_keyboard(lang_code):
     keyboard = InlineKeyboardMarkup()
     row = []
     durations = [30, 60, 120, 180, 240, 300]
@@ -567,11 +902,14 @@ def duration_keyboard(lang_code, processing_message_id):
         if len(row) == 3:
             keyboard.row(*row)
             row = []
-        row.append(InlineKeyboardButton(text=f"{duration} {get_string('second', lang_code)}", callback_data=f"duration_{duration}_{processing_message_id}"))
+        row.append(InlineKeyboardButton(text=f"{duration} {get_string('second', lang_code)}", callback_data=f"duration_{duration}"))
     if row:
         keyboard.row(*row)
     return keyboard
 
+def duration_keyboard(lang_code):
+    return static_keyboard(DURATION_KEYBOARDS, build_duration_keyboard, lang_code)
+
 def file_link_keyboard(lang_code, url, allowed=False):
     if not allowed:
         return None
@@ -579,10 +917,10 @@ def file_link_keyboard(lang_code, url, allowed=False):
     kb.row(InlineKeyboardButton(get_string('file_link', lang_code), url=url))
     return kb
 
-def language_keyboard():
+def build_language_keyboard():
     keyboard = InlineKeyboardMarkup()
     row = []
-    for lang_code in LANGUAGES.keys():
+    for lang_code in catalog.codes():
         if len(row) == 3:
             keyboard.row(*row)
             row = []
@@ -591,6 +929,14 @@ def language_keyboard():
         keyboard.row(*row)
     return keyboard
 
+def language_keyboard():
+    return static_keyboard(LANGUAGE_KEYBOARDS, lambda lang_code: build_language_keyboard(), DEFAULT_LANGUAGE)
+
+TYPE_KEYBOARDS = {}
+ADMIN_KEYBOARDS = {}
+DURATION_KEYBOARDS = {}
+LANGUAGE_KEYBOARDS = {}
+
 def crop_keyboard(lang_code, processing_message_id):
     keyboard = InlineKeyboardMarkup()
     return keyboard.row(
@@ -598,28 +944,209 @@ def crop_keyboard(lang_code, processing_message_id):
         InlineKeyboardButton(get_string('precise', lang_code), callback_data=f"crop_mode_{processing_message_id}_precise")
     )
 
-def get_or_create_client(user):
+def get_or_create_client(username):
     try:
-        return api.get_client(admin.get_key(f'{user.username}_downvot'))
+        return get_user_client(username)
     except APIError:
         if AUTO_CREATE_KEY:
-            admin.create_key(f'{user.username}_downvot', ["get_video", "get_audio", "get_info"])
-            return api.get_client(admin.get_key(f'{user.username}_downvot'))
+            admin.create_key(f'{username}_downvot', ["get_video", "get_audio", "get_live_video", "get_live_audio", "get_info"])
+            return get_user_client(username)
         raise
 
+def inline_user_allowed(user):
+    if config_store.is_allowed(str(user.username)):
+        return True
+    if AUTO_ALLOWED_CHANNEL:
+        try:
+            return check_channel_membership(user.id)
+        except Exception as e:
+            logger.error(f"Error checking channel membership for inline user {user.username}: {str(e)}")
+    return False
+
+def inline_presets(info):
+    audio_qualities = list(info['qualities']['audio'].items())
+    if not audio_qualities:
+        return []
+    audio_format, audio_format_info = audio_qualities[-1]
+    presets = []
+    fitting = [video_format for video_format, video_format_info in info['qualities']['video'].items() if video_format_info.size + audio_format_info.size <= MAX_TELEGRAM_FILE_SIZE]
+    if fitting:
+        presets.append(('video', fitting[-1], audio_format, 'mp4'))
+    if audio_format_info.size <= MAX_TELEGRAM_FILE_SIZE:
+        presets.append(('audio', None, audio_format, 'mp3'))
+    return presets
+
+def inline_job(url, info, preset, username, lang_code):
+    file_type, video_format, audio_format, output_format = preset
+    video_format_info = info['qualities']['video'][video_format] if file_type == 'video' else None
+    audio_format_info = info['qualities']['audio'][audio_format]
+    return {
+        'url': url,
+        'file_type': file_type,
+        'live': False,
+        'duration': info['duration'],
+        'video_format': video_format,
+        'audio_format': audio_format,
+        'output_format': output_format,
+        'start_time': None,
+        'end_time': None,
+        'force_keyframes': False,
+        'total_size': (video_format_info.size if video_format_info else 0) + audio_format_info.size,
+        'username': username,
+        'info': info,
+        'video_format_info': video_format_info,
+        'audio_format_info': audio_format_info,
+        'caption': build_caption(lang_code, url, info, file_type, video_format_info, audio_format_info),
+        'cache_key': file_cache_key(url, file_type, video_format, audio_format, output_format, None, None, False)
+    }
+
+def cached_inline_result(job, cached, lang_code):
+    kind, file_id, _ = cached
+    if job['file_type'] == 'video':
+        quality = f"{job['video_format_info'].height}p{job['video_format_info'].fps}"
+    else:
+        quality = f"{job['audio_format_info'].abr}kbps"
+    title = get_string(f"inline_{job['file_type']}_title", lang_code).format(title=job['info']['title'])
+    description = get_string(f"inline_{job['file_type']}_description", lang_code).format(quality=quality)
+    if kind == 'video':
+        return InlineQueryResultCachedVideo(job['file_type'], file_id, title, description=description, caption=job['caption'], parse_mode='HTML')
+    if kind == 'audio':
+        return InlineQueryResultCachedAudio(job['file_type'], file_id, caption=job['caption'], parse_mode='HTML')
+    return InlineQueryResultCachedDocument(job['file_type'], file_id, title, description=description, caption=job['caption'], parse_mode='HTML')
+
+def answer_inline_query(query):
+    lang_code = query.from_user.language_code
+    source, url = detect_source(query.query.strip())
+    if not source:
+        bot.answer_inline_query(query.id, [], cache_time=INLINE_CACHE_TIME, is_personal=True)
+        return
+    if not inline_user_allowed(query.from_user):
+        requests_total.inc(result='denied')
+        bot.answer_inline_query(query.id, [], cache_time=INLINE_CACHE_TIME, is_personal=True)
+        return
+    requests_total.inc(result='allowed')
+    info = info_cache.get(url)
+    if info is None:
+        info = file_id_cache.get_info(url, INFO_CACHE_TTL)
+        if info is not None:
+            info_cache.set(url, info)
+    if info is not None and info['is_live']:
+        bot.answer_inline_query(query.id, [], cache_time=INLINE_CACHE_TIME, is_personal=True)
+        return
+    results = []
+    missing = info is None
+    for preset in inline_presets(info) if info else []:
+        job = inline_job(url, info, preset, query.from_user.username, lang_code)
+        cached = file_id_cache.get(job['cache_key'])
+        if cached:
+            results.append(cached_inline_result(job, cached, lang_code))
+        else:
+            missing = True
+    if missing and schedule_inline_job(query.from_user, url, info is None):
+        results.append(InlineQueryResultArticle(
+            'preparing',
+            get_string('inline_preparing_title', lang_code).format(title=info['title'] if info else url),
+            InputTextMessageContent(url),
+            description=get_string('inline_preparing_description', lang_code),
+            thumbnail_url=info['thumbnail'] if info else None
+        ))
+    bot.answer_inline_query(query.id, results, cache_time=0 if missing else INLINE_CACHE_TIME, is_personal=True)
+
+def schedule_inline_job(user, url, fetch_info):
+    if not INLINE_CACHE_CHAT:
+        return False
+    if url in inline_pending:
+        return True
+    premium = config_store.is_premium(user.username)
+    try:
+        download_limiter.acquire(user.id, premium)
+        if fetch_info:
+            try:
+                info_limiter.acquire(user.id, premium)
+            except RateLimited:
+                download_limiter.refund(user.id, premium)
+                raise
+    except RateLimited:
+        logger.info(f"Skipping inline preparation of {url} for user {user.username}: rate limited")
+        return False
+    inline_pending.set(url, True)
+    try:
+        job_executor.submit(f'inline_{user.id}', prepare_inline, user.id, user.username, user.language_code, url)
+    except (QueueFull, UserLimitReached) as e:
+        inline_pending.pop(url)
+        if fetch_info:
+            info_limiter.refund(user.id, premium)
+        download_limiter.refund(user.id, premium)
+        logger.info(f"Skipping inline preparation of {url} for user {user.username}: {type(e).__name__}")
+        return False
+    return True
+
+def prepare_inline(user_id, username, lang_code, url):
+    try:
+        client = get_or_create_client(username)
+        info = get_video_info(client, url)
+        if info['is_live']:
+            return
+        file_id_cache.set_info(url, info, INFO_CACHE_TTL)
+        chat_id = INLINE_CACHE_CHAT
+        for preset in inline_presets(info):
+            job = inline_job(url, info, preset, username, lang_code)
+            if file_id_cache.get(job['cache_key']):
+                continue
+            job_registry.run(job['cache_key'], lambda: upload_inline_file(client, chat_id, job))
+            jobs_total.inc(result='inline', file_type=job['file_type'], output_format=job['output_format'])
+    finally:
+        inline_pending.pop(url)
+
+def upload_inline_file(client, chat_id, job):
+    logger.info(f"Preparing inline {job['file_type']} for {job['url']}")
+    task = submit_task(client, job)
+    task_result = task_watcher.watch(task, expected_task_time(job)).result()
+    if job['file_type'] == 'video':
+        method, file_field, params = 'sendVideo', 'video', {'supports_streaming': True}
+    else:
+        method, file_field, params = 'sendAudio', 'audio', {}
+    local_path = local_file_path(task_result) if LOCAL_BOT_API else None
+    if local_path:
+        sent_message = streaming.send_local_file(method, file_field, chat_id, local_path, caption=job['caption'], parse_mode='HTML', **params)
+    else:
+        file_obj, file_size = streaming.download_result(task_result, MAX_TELEGRAM_FILE_SIZE)
+        try:
+            sent_message = streaming.send_file(method, file_field, chat_id, file_obj, file_size, result_filename(job['info'], job), caption=job['caption'], parse_mode='HTML', **params)
+        finally:
+            file_obj.close()
+    remember_file_id(job['cache_key'], sent_message, task_result.get_file_url())
+    return sent_message
+
+def debounce_inline_query(query):
+    inline_debouncer.call(query.from_user.id, run_inline_query, query)
+
+def run_inline_query(query):
+    try:
+        answer_inline_query(query)
+    except Exception as e:
+        logger.error(f"Inline query error: {e}")
+
+def search_result_at(chat_id, index):
+    session = user_data[chat_id]
+    if session.get('current_index') == index and session.get('search_result'):
+        return session['search_result']
+    results = get_search_results(session['search_query'])
+    return results[index] if 0 <= index < len(results) else None
+
 def show_search_result(chat_id, lang_code, index, message_id):
-    results = user_data[chat_id]['search_results']
+    results = get_search_results(user_data[chat_id]['search_query'])
     total_results = len(results)
-    
-    if index < 0:
-        index = 0
-    elif index >= total_results:
-        index = total_results - 1
+    if not 0 <= index < total_results:
+        bot.send_message(chat_id, get_string('no_results', lang_code))
+        return
 
     result = results[index]
+    user_data[chat_id]['current_index'] = index
+    user_data[chat_id]['search_result'] = result
     title = result['title']
     link = f"https://www.youtube.com{result['url_suffix']}"
-    thumbnail = result['thumbnails'][0]
+    thumbnail = result['thumbnail']
 
     keyboard = InlineKeyboardMarkup()
     keyboard.row(
@@ -630,3 +1157,5 @@ def show_search_result(chat_id, lang_code, index, message_id):
 
     media = InputMediaPhoto(thumbnail, caption=f"<a href='{link}'>{title}</a>", parse_mode='HTML')
     bot.edit_message_media(media=media, chat_id=chat_id, message_id=message_id, reply_markup=keyboard)
+    if PREFETCH_ENABLED:
+        prefetch_search_results(chat_id, results, index)
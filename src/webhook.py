@@ -0,0 +1,111 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from telebot.types import Update
+import json, logging, queue, threading
+
+logger = logging.getLogger(__name__)
+
+class WebhookServer:
+    def __init__(self, bot, host, port, path, secret='', queue_size=1000, workers=4):
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self.workers = workers
+        self.updates = queue.Queue(maxsize=queue_size)
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.routes = {'/health': self.health}
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def reply(self, status, body=b'', content_type='application/json', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                route = server.routes.get(self.path.split('?', 1)[0])
+                if not route:
+                    return self.reply(404)
+                body, content_type = route()
+                self.reply(200, body, content_type)
+
+            def do_POST(self):
+                if self.path != server.path:
+                    return self.reply(404)
+                if server.secret and self.headers.get('X-Telegram-Bot-Api-Secret-Token') != server.secret:
+                    return self.reply(403)
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    update = Update.de_json(self.rfile.read(length).decode('utf-8'))
+                except Exception as e:
+                    logger.warning(f"Rejected malformed webhook update: {e}")
+                    return self.reply(400)
+                if not server.enqueue(update):
+                    return self.reply(503, headers={'Retry-After': '1'})
+                self.reply(200)
+
+        return Handler
+
+    def enqueue(self, update):
+        try:
+            self.updates.put_nowait(update)
+        except queue.Full:
+            self.rejected += 1
+            logger.warning(f"Webhook queue full ({self.updates.maxsize}), rejecting update {update.update_id}")
+            return False
+        self.accepted += 1
+        return True
+
+    def stats(self):
+        return {
+            'queue_depth': self.updates.qsize(),
+            'queue_size': self.updates.maxsize,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'processed': self.processed,
+            'failed': self.failed
+        }
+
+    def health(self):
+        body = json.dumps({'status': 'ok', **self.stats()}).encode('utf-8')
+        return body, 'application/json'
+
+    def dispatch(self):
+        while True:
+            update = self.updates.get()
+            try:
+                self.bot.process_new_updates([update])
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing update {update.update_id}: {e}")
+            finally:
+                self.updates.task_done()
+
+    def start(self):
+        self.bot.threaded = False
+        for i in range(self.workers):
+            threading.Thread(target=self.dispatch, name=f'webhook-dispatcher-{i}', daemon=True).start()
+        host, port = self.httpd.server_address[:2]
+        logger.info(f"Webhook server listening on {host}:{port}{self.path}")
+
+    def serve_forever(self):
+        self.start()
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
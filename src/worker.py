@@ -0,0 +1,21 @@
+from config import DOWNLOAD_WORKERS, WORKER_ID
+from state import user_data, job_executor, runtime
+from utils import get_user_client, process_request, prepare_inline
+import logging, threading
+
+logger = logging.getLogger(__name__)
+
+def run_request(chat_id, processing_message_id):
+    if not user_data.reload(chat_id):
+        raise KeyError(f"No session for chat {chat_id}")
+    session = user_data[chat_id]
+    session['client'] = get_user_client(session['username'])
+    process_request(chat_id, processing_message_id)
+
+HANDLERS = {'process_request': run_request, 'prepare_inline': prepare_inline}
+
+def run_worker():
+    if runtime:
+        threading.Thread(target=runtime.loop.run_forever, name='async-runtime', daemon=True).start()
+    logger.info(f"Starting download worker with {DOWNLOAD_WORKERS} threads")
+    job_executor.serve(HANDLERS, DOWNLOAD_WORKERS, WORKER_ID or None)
@@ -0,0 +1,28 @@
+import json, os, sys, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+workdir = tempfile.mkdtemp(prefix='downvot-tests-')
+with open(os.path.join(ROOT, 'config.json')) as config_file:
+    config = json.load(config_file)
+config.update({
+    'BOT_TOKEN': '123456:test',
+    'API_BASE_URL': 'http://127.0.0.1:9',
+    'ADMIN_API_KEY': 'test-admin',
+    'ALLOWED_USERS': ['alice', 'vip'],
+    'PREMIUM_USERS': ['vip'],
+    'AUTO_ALLOWED_CHANNEL': '',
+    'DEFAULT_LANGUAGE': 'en',
+    'RUNTIME': 'threaded',
+    'ROLE': 'standalone',
+    'METRICS_PORT': 0,
+    'SESSION_BACKEND': 'memory',
+    'FILE_ID_CACHE_PATH': os.path.join(workdir, 'file_ids.db'),
+    'SESSION_DB_PATH': os.path.join(workdir, 'sessions.db'),
+    'JOB_QUEUE_PATH': os.path.join(workdir, 'jobs.db'),
+    'TEMP_DIR': workdir
+})
+with open(os.path.join(workdir, 'config.json'), 'w') as config_file:
+    json.dump(config, config_file)
+os.environ['DOWNVOT_CONFIG'] = os.path.join(workdir, 'config.json')
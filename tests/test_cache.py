@@ -0,0 +1,72 @@
+from cache import TTLCache, SingleFlight
+import threading, time
+import pytest
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(2, 60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+def test_entries_expire():
+    cache = TTLCache(10, 0.05)
+    cache.set('short', 1)
+    cache.set('long', 2, ttl=60)
+    time.sleep(0.1)
+    assert cache.get('short') is None
+    assert 'short' not in cache
+    assert cache.get('long') == 2
+
+def test_pop_and_stats():
+    cache = TTLCache(10, 60)
+    cache.set('a', 1)
+    assert cache.pop('a') == 1
+    assert cache.pop('a', 'gone') == 'gone'
+    cache.get('a')
+    cache.set('b', 2)
+    cache.get('b')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'info'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.run('url', load)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.run('url', load))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flights.stats()['waiting'] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda result: not result[1]) == [('info', True)] + [('info', False)] * 3
+    assert flights.stats() == {'in_flight': 0, 'waiting': 0, 'started': 1, 'merged': 3}
+
+def test_single_flight_shares_errors_and_forgets_the_key():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flights.do('url', fail)
+    assert flights.do('url', lambda: 'retried') == 'retried'
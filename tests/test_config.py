@@ -0,0 +1,31 @@
+from config import ConfigStore
+import json, os
+
+def write(path, allowed, premium, mtime):
+    path.write_text(json.dumps({'ALLOWED_USERS': allowed, 'PREMIUM_USERS': premium}))
+    os.utime(path, ns=(mtime, mtime))
+
+def test_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / 'config.json'
+    write(path, ['alice'], [], 1_000_000_000)
+    store = ConfigStore(str(path))
+    assert store.is_allowed('alice')
+    assert not store.is_premium('alice')
+
+    store.reload_if_changed()
+    assert store.is_allowed('alice')
+
+    write(path, ['alice', 'bob'], ['alice'], 2_000_000_000)
+    store.reload_if_changed()
+    assert store.is_allowed('bob')
+    assert store.is_premium('alice')
+
+def test_keeps_previous_values_on_a_broken_file(tmp_path):
+    path = tmp_path / 'config.json'
+    write(path, ['alice'], ['alice'], 1_000_000_000)
+    store = ConfigStore(str(path))
+    path.write_text('{"ALLOWED_USERS": [')
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    store.reload_if_changed()
+    assert store.is_allowed('alice')
+    assert store.is_premium('alice')
@@ -0,0 +1,30 @@
+from debounce import Debouncer
+import threading, time
+
+def test_only_the_latest_call_per_key_fires():
+    debouncer = Debouncer(0.05, 2)
+    calls = []
+    done = threading.Event()
+
+    def record(value):
+        calls.append(value)
+        if len(calls) == 2:
+            done.set()
+
+    for text in ('h', 'he', 'hello'):
+        debouncer.call(1, record, text)
+    debouncer.call(2, record, 'other')
+    assert done.wait(2)
+    time.sleep(0.1)
+    assert sorted(calls) == ['hello', 'other']
+    stats = debouncer.stats()
+    assert stats['superseded'] == 2
+    assert stats['fired'] == 2
+    assert stats['pending'] == 0
+
+def test_reuses_one_scheduler_thread():
+    debouncer = Debouncer(0.01, 1)
+    before = threading.active_count()
+    for i in range(50):
+        debouncer.call(i % 5, lambda: None)
+    assert threading.active_count() - before <= 2
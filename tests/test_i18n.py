@@ -0,0 +1,45 @@
+from i18n import Catalog
+import json
+
+def write(path, lang_code, strings):
+    (path / f'{lang_code}.json').write_text(json.dumps(strings), encoding='utf-8')
+
+def make_catalog(tmp_path, rescan_interval=0):
+    write(tmp_path, 'en', {'hello': 'Hello {name}', 'bye': 'Bye'})
+    write(tmp_path, 'ru', {'hello': 'Привет {name}', 'bad': 'Oops {missing}'})
+    return Catalog(str(tmp_path), 'en', rescan_interval)
+
+def test_languages_fall_back_to_the_default(tmp_path):
+    catalog = make_catalog(tmp_path)
+    assert catalog.get('hello', 'ru') == 'Привет {name}'
+    assert catalog.get('bye', 'ru') == 'Bye'
+    assert catalog.get('unknown_key', 'ru') == 'unknown_key'
+
+def test_templates_with_unknown_fields_are_skipped(tmp_path):
+    write(tmp_path, 'en', {'hello': 'Hello {name}'})
+    write(tmp_path, 'de', {'hello': 'Hallo {user}'})
+    catalog = Catalog(str(tmp_path), 'en')
+    assert catalog.get('hello', 'de') == 'Hello {name}'
+
+def test_languages_load_lazily(tmp_path):
+    catalog = make_catalog(tmp_path)
+    assert catalog.stats() == {'available': 2, 'loaded': 1}
+    catalog.get('hello', 'ru')
+    assert catalog.stats() == {'available': 2, 'loaded': 2}
+
+def test_unknown_codes_are_not_cached(tmp_path):
+    catalog = make_catalog(tmp_path, rescan_interval=3600)
+    for i in range(100):
+        assert catalog.get('hello', f'x{i}') == 'Hello {name}'
+    assert len(catalog.languages) == 1
+
+def test_language_files_added_later_are_found(tmp_path):
+    catalog = make_catalog(tmp_path)
+    write(tmp_path, 'pl', {'hello': 'Cześć {name}'})
+    assert catalog.get('hello', 'pl') == 'Cześć {name}'
+    assert 'pl' in catalog.codes()
+
+def test_rescans_are_rate_limited(tmp_path):
+    catalog = make_catalog(tmp_path, rescan_interval=3600)
+    write(tmp_path, 'pl', {'hello': 'Cześć {name}'})
+    assert catalog.get('hello', 'pl') == 'Hello {name}'
@@ -0,0 +1,106 @@
+from formats import VideoFormat, AudioFormat
+from types import SimpleNamespace
+from state import info_cache, file_id_cache, inline_pending
+import utils
+import pytest
+
+MB = 1024 * 1024
+URL = 'https://www.youtube.com/watch?v=inline'
+
+def make_info(video_sizes, audio_size):
+    return {
+        'title': 'Clip', 'thumbnail': 'https://i.ytimg.com/vi/x/hq.jpg', 'duration': 60, 'is_live': False,
+        'qualities': {
+            'video': {str(height): VideoFormat(height, 30, height * 16 // 9, 'SDR', size, None) for height, size in video_sizes},
+            'audio': {'140': AudioFormat(128, 'en', audio_size, None)}
+        }
+    }
+
+class FakeBot:
+    def __init__(self):
+        self.answers = []
+
+    def answer_inline_query(self, query_id, results, **kwargs):
+        self.answers.append((results, kwargs))
+
+class FakeExecutor:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, user_key, fn, *args, key=None):
+        self.jobs.append((user_key, fn.__name__, args))
+        return 0
+
+def make_query(url=URL, username='alice'):
+    return SimpleNamespace(id='1', query=url, from_user=SimpleNamespace(id=5, username=username, language_code='en'))
+
+@pytest.fixture
+def bot(monkeypatch):
+    fake = FakeBot()
+    monkeypatch.setattr(utils, 'bot', fake)
+    info_cache.clear()
+    inline_pending.clear()
+    return fake
+
+def test_presets_pick_the_largest_fitting_video_and_audio():
+    info = make_info([(360, 5 * MB), (720, 20 * MB), (1080, 4000 * MB)], 3 * MB)
+    assert utils.inline_presets(info) == [('video', '720', '140', 'mp4'), ('audio', None, '140', 'mp3')]
+
+def test_presets_skip_everything_too_large():
+    info = make_info([(1080, 4000 * MB)], 4000 * MB)
+    assert utils.inline_presets(info) == []
+
+def test_cached_file_ids_are_answered_directly(bot):
+    info = make_info([(720, 20 * MB)], 3 * MB)
+    info_cache.set(URL, info)
+    for preset in utils.inline_presets(info):
+        job = utils.inline_job(URL, info, preset, 'alice', 'en')
+        file_id_cache.set(job['cache_key'], 'video' if preset[0] == 'video' else 'audio', f'{preset[0]}-id')
+    utils.answer_inline_query(make_query())
+    results, kwargs = bot.answers[-1]
+    assert [result.type for result in results] == ['video', 'audio']
+    assert kwargs['cache_time'] == utils.INLINE_CACHE_TIME
+
+def test_missing_files_schedule_a_job_and_show_a_placeholder(bot, monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(utils, 'job_executor', executor)
+    monkeypatch.setattr(utils, 'INLINE_CACHE_CHAT', '@cache')
+    url = URL + 'new'
+    utils.answer_inline_query(make_query(url))
+    results, kwargs = bot.answers[-1]
+    assert [result.type for result in results] == ['article']
+    assert kwargs['cache_time'] == 0
+    assert executor.jobs == [('inline_5', 'prepare_inline', (5, 'alice', 'en', url))]
+    assert url in inline_pending
+
+    utils.answer_inline_query(make_query(url))
+    assert len(executor.jobs) == 1
+
+def test_no_cache_chat_means_no_preparation(bot, monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(utils, 'job_executor', executor)
+    monkeypatch.setattr(utils, 'INLINE_CACHE_CHAT', '')
+    utils.answer_inline_query(make_query(URL + 'other'))
+    assert bot.answers[-1][0] == []
+    assert executor.jobs == []
+
+def test_unauthorized_users_get_nothing(bot):
+    info_cache.set(URL, make_info([(720, 20 * MB)], 3 * MB))
+    utils.answer_inline_query(make_query(username='mallory'))
+    assert bot.answers[-1][0] == []
+
+def test_release_clears_pending_inline_jobs():
+    inline_pending.set(URL, True)
+    utils.release_job('prepare_inline', [5, 'alice', 'en', URL])
+    assert URL not in inline_pending
+
+def test_info_shared_through_the_file_cache_is_used(bot):
+    url = URL + 'shared'
+    info = make_info([(720, 20 * MB)], 3 * MB)
+    file_id_cache.set_info(url, info, utils.INFO_CACHE_TTL)
+    for preset in utils.inline_presets(info):
+        job = utils.inline_job(url, info, preset, 'alice', 'en')
+        file_id_cache.set(job['cache_key'], 'video' if preset[0] == 'video' else 'audio', f'{preset[0]}-id')
+    utils.answer_inline_query(make_query(url))
+    assert [result.type for result in bot.answers[-1][0]] == ['video', 'audio']
+    assert info_cache.get(url) is not None
@@ -0,0 +1,78 @@
+from jobqueue import JobQueue
+from jobs import UserLimitReached
+import time
+import pytest
+
+def process_request(chat_id, message_id):
+    pass
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / 'jobs.db'), 10, 2, **kwargs)
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=0.05)
+    queue.submit(1, process_request, 1, 10)
+    job = queue.claim('worker-a')
+    assert job[2:] == ('process_request', '[1, 10]')
+    assert queue.claim('worker-b') is None
+    time.sleep(0.1)
+    reclaimed = queue.claim('worker-b')
+    assert reclaimed[0] == job[0]
+    assert queue.stats()['requeued'] == 1
+    assert queue.stats()['running'] == 1
+
+def test_finished_jobs_are_not_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=0.05)
+    queue.submit(1, process_request, 1, 10)
+    job = queue.claim('worker-a')
+    queue.finish(job[0], 'worker-a')
+    time.sleep(0.1)
+    assert queue.claim('worker-b') is None
+    assert queue.stats()['requeued'] == 0
+
+def test_per_user_limit_counts_running_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.submit(1, process_request, 1, 10)
+    queue.claim('worker-a')
+    queue.submit(1, process_request, 1, 11)
+    with pytest.raises(UserLimitReached):
+        queue.submit(1, process_request, 1, 12)
+
+def test_duplicate_waits_for_other_worker(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.submit(1, process_request, 1, 10, key='video')
+    queue.submit(2, process_request, 2, 20, key='video')
+    first = queue.claim('worker-a')
+    assert queue.claim('worker-b') is None
+    assert queue.claim('worker-a')[0] != first[0]
+
+def test_heartbeat_keeps_a_long_job_leased(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=0.1)
+    queue.submit(1, process_request, 1, 10)
+    job = queue.claim('worker-a')
+    queue.active.add(job[0])
+    for _ in range(4):
+        time.sleep(0.05)
+        queue.heartbeat('worker-a')
+    assert queue.claim('worker-b') is None
+    assert queue.finish(job[0], 'worker-a')
+
+def test_stolen_lease_is_not_acknowledged(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=0.05)
+    queue.submit(1, process_request, 1, 10)
+    job = queue.claim('worker-a')
+    time.sleep(0.1)
+    queue.claim('worker-b')
+    assert not queue.finish(job[0], 'worker-a')
+    assert queue.stats()['lost'] == 1
+    assert queue.stats()['running'] == 1
+    assert queue.finish(job[0], 'worker-b')
+
+def test_position_matches_fair_order(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), 10, 5)
+    assert queue.submit('a', process_request, 1, 10) == 1
+    assert queue.submit('a', process_request, 1, 11) == 2
+    assert queue.submit('b', process_request, 2, 20) == 2
+    queue.workers = 2
+    queue.heartbeat('worker-a')
+    assert queue.submit('c', process_request, 3, 30) == 1
@@ -0,0 +1,51 @@
+from jobs import JobExecutor, QueueFull, UserLimitReached, queue_position
+import threading
+import pytest
+
+def test_round_robin_between_users():
+    executor = JobExecutor(1, 10, 3)
+    started, release, done = threading.Event(), threading.Event(), threading.Event()
+    order = []
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    def record(name):
+        order.append(name)
+        if len(order) == 4:
+            done.set()
+
+    executor.submit('x', blocker)
+    assert started.wait(5)
+    executor.submit('a', record, 'a1')
+    executor.submit('a', record, 'a2')
+    executor.submit('a', record, 'a3')
+    executor.submit('b', record, 'b1')
+    release.set()
+    assert done.wait(5)
+    assert order == ['a1', 'b1', 'a2', 'a3']
+
+def test_per_user_limit_and_queue_size():
+    executor = JobExecutor(1, 2, 2)
+    started, release = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    executor.submit('a', blocker)
+    assert started.wait(5)
+    executor.submit('a', release.wait, 5)
+    with pytest.raises(UserLimitReached):
+        executor.submit('a', release.wait, 5)
+    executor.submit('b', release.wait, 5)
+    with pytest.raises(QueueFull):
+        executor.submit('c', release.wait, 5)
+    release.set()
+
+def test_queue_position_interleaves_users():
+    counts = {'a': 3, 'b': 1, 'c': 2}
+    assert queue_position(counts, 'b', 0) == 3
+    assert queue_position(counts, 'c', 0) == 5
+    assert queue_position(counts, 'c', 5) == 0
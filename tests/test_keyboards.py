@@ -0,0 +1,48 @@
+from formats import VideoFormat, AudioFormat
+from state import user_data
+import utils
+
+QUALITIES = {
+    'video': {'136': VideoFormat(720, 30, 1280, 'SDR', 2000000, None), '137': VideoFormat(1080, 30, 1920, 'SDR', 4000000, None)},
+    'audio': {'140': AudioFormat(128, 'en', 500000, None)}
+}
+
+def make_session(chat_id, username='alice'):
+    user_data[chat_id] = {'language': 'en', 'username': username, '10': {'file_type': 'video', 'file_info': {'qualities': QUALITIES, 'duration': 120, 'is_live': False}}}
+    return user_data[chat_id]['10']
+
+def buttons(keyboard):
+    return [button.callback_data for row in keyboard.keyboard for button in row]
+
+def test_same_selection_reuses_the_keyboard():
+    processing_data = make_session(101)
+    first = utils.quality_keyboard(QUALITIES, 101, '10')
+    assert processing_data['video_format'] == '137'
+    assert processing_data['total_size'] > 0
+    assert utils.quality_keyboard(QUALITIES, 101, '10') is first
+
+def test_selection_change_builds_and_restores_state():
+    processing_data = make_session(102)
+    default = utils.quality_keyboard(QUALITIES, 102, '10')
+    default_size = processing_data['total_size']
+    processing_data['video_format'] = '136'
+    smaller = utils.quality_keyboard(QUALITIES, 102, '10', selected_video='136', selected_audio='140')
+    assert smaller is not default
+    assert processing_data['video_format'] == '136'
+    assert processing_data['total_size'] < default_size
+    assert buttons(smaller) != buttons(default)
+
+    assert utils.quality_keyboard(QUALITIES, 102, '10') is default
+    assert processing_data['video_format'] == '137'
+    assert processing_data['total_size'] == default_size
+
+def test_premium_change_is_not_served_from_the_memo(monkeypatch):
+    make_session(103, username='bob')
+    regular = utils.quality_keyboard(QUALITIES, 103, '10')
+    monkeypatch.setattr(utils.config_store, 'premium_users', frozenset(['bob']))
+    assert utils.quality_keyboard(QUALITIES, 103, '10') is not regular
+
+def test_static_keyboards_are_built_once_per_language():
+    assert utils.type_keyboard('en') is utils.type_keyboard('en')
+    assert utils.type_keyboard('en') is not utils.type_keyboard('ru')
+    assert utils.type_keyboard('xx') is utils.type_keyboard('en')
@@ -0,0 +1,56 @@
+from outbound import OutboundGovernor
+import threading, time
+
+UNLIMITED = {'per_minute': 10 ** 6, 'burst': 1000}
+
+def test_pending_edits_coalesce_to_latest():
+    governor = OutboundGovernor({'chat': {'per_minute': 120, 'burst': 1}, 'group': UNLIMITED, 'global': UNLIMITED})
+    assert governor.call(lambda: 'sent', 7) == 'sent'
+    results = {}
+
+    def edit(text):
+        results[text] = governor.call(lambda: text, 7, message_id=100)
+
+    threads = []
+    for text in ('first', 'second', 'third'):
+        thread = threading.Thread(target=edit, args=(text,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {'first': None, 'second': None, 'third': 'third'}
+    stats = governor.stats()
+    assert stats['coalesced'] == 2
+    assert stats['sent'] == 2
+    assert stats['pending_edits'] == 0
+
+def test_edits_to_different_messages_are_all_sent():
+    governor = OutboundGovernor({'chat': UNLIMITED, 'group': UNLIMITED, 'global': UNLIMITED})
+    assert governor.call(lambda: 'a', 7, message_id=1) == 'a'
+    assert governor.call(lambda: 'b', 7, message_id=2) == 'b'
+    assert governor.stats()['coalesced'] == 0
+
+def test_edits_of_different_kinds_are_not_coalesced():
+    governor = OutboundGovernor({'chat': {'per_minute': 120, 'burst': 1}, 'group': UNLIMITED, 'global': UNLIMITED})
+    governor.call(lambda: 'sent', 7)
+    results = {}
+
+    def edit(method):
+        results[method] = governor.call(lambda: method, 7, message_id=100, method=method)
+
+    threads = [threading.Thread(target=edit, args=(method,)) for method in ('edit_message_text', 'edit_message_reply_markup')]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+    assert results == {'edit_message_text': 'edit_message_text', 'edit_message_reply_markup': 'edit_message_reply_markup'}
+    assert governor.stats()['coalesced'] == 0
+
+def test_channel_usernames_use_group_limits():
+    governor = OutboundGovernor({'chat': {'per_minute': 60, 'burst': 5}, 'group': {'per_minute': 20, 'burst': 2}, 'global': UNLIMITED})
+    assert governor.chat_bucket('@cache_channel').capacity == 2
+    assert governor.chat_bucket(-1001).capacity == 2
+    assert governor.chat_bucket(42).capacity == 5
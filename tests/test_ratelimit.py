@@ -0,0 +1,40 @@
+from ratelimit import RateLimiter, RateLimited
+import pytest
+
+def test_burst_then_reject_with_retry_after():
+    limiter = RateLimiter('download', {'user': {'per_minute': 6, 'burst': 2}})
+    limiter.acquire(1)
+    limiter.acquire(1)
+    with pytest.raises(RateLimited) as excinfo:
+        limiter.acquire(1)
+    assert excinfo.value.retry_after == 10
+    limiter.acquire(2)
+    stats = limiter.stats()
+    assert (stats['admitted'], stats['rejected'], stats['users']) == (3, 1, 2)
+
+def test_premium_users_get_their_own_limit():
+    limiter = RateLimiter('download', {'user': {'per_minute': 1, 'burst': 1}, 'premium': {'per_minute': 60, 'burst': 3}})
+    limiter.acquire('a')
+    with pytest.raises(RateLimited):
+        limiter.acquire('a')
+    for _ in range(3):
+        limiter.acquire('b', premium=True)
+
+def test_global_bucket_applies_across_users():
+    limiter = RateLimiter('info', {'global': {'per_minute': 60, 'burst': 2}})
+    limiter.acquire(1)
+    limiter.acquire(2)
+    with pytest.raises(RateLimited):
+        limiter.acquire(3)
+
+def test_refund_returns_the_token():
+    limiter = RateLimiter('download', {'user': {'per_minute': 1, 'burst': 1}, 'global': {'per_minute': 1, 'burst': 1}})
+    limiter.acquire(1)
+    limiter.refund(1)
+    limiter.acquire(1)
+    assert limiter.stats()['refunded'] == 1
+
+def test_no_limits_admit_everything():
+    limiter = RateLimiter('download', {})
+    for _ in range(100):
+        limiter.acquire(1)
@@ -0,0 +1,49 @@
+from formats import VideoFormat, AudioFormat
+from session_backends import SQLiteBackend, serialize_session, deserialize_session
+from sessions import SessionStore
+
+def make_session():
+    return {
+        'language': 'en',
+        'client': object(),
+        '100': {
+            'url': 'https://www.youtube.com/watch?v=abc',
+            '_timer': object(),
+            'file_info': {
+                'is_live': False,
+                'qualities': {
+                    'video': {'137': VideoFormat(1080, 30, 1920, 'SDR', 1000, None)},
+                    'audio': {'140': AudioFormat(128, 'en', 500, None)}
+                }
+            }
+        }
+    }
+
+def test_format_encodings_round_trip():
+    session = make_session()
+    original = session['100']['file_info']['qualities']
+    data = deserialize_session(serialize_session(session))
+    qualities = data['100']['file_info']['qualities']
+    assert isinstance(qualities['video']['137'], VideoFormat)
+    assert qualities['video']['137'].to_list() == original['video']['137'].to_list()
+    assert isinstance(qualities['audio']['140'], AudioFormat)
+    assert qualities['audio']['140'].to_list() == original['audio']['140'].to_list()
+    assert 'client' not in data
+    assert '_timer' not in data['100']
+
+def test_lists_that_look_like_formats_stay_plain():
+    data = deserialize_session(serialize_session({'history': [[1080, 30, 1920, 'SDR', 1000, None]]}))
+    assert data['history'] == [[1080, 30, 1920, 'SDR', 1000, None]]
+
+def test_sqlite_backend_restores_sessions(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    backend = SQLiteBackend(path, flush_interval=3600)
+    store = SessionStore(10, 3600, 600, backend=backend)
+    store[42] = make_session()
+    backend.flush()
+
+    restored = SessionStore(10, 3600, 600, backend=SQLiteBackend(path, read_only=True))
+    session = restored[42]
+    assert session['language'] == 'en'
+    assert session['100']['file_info']['qualities']['video']['137'].height == 1080
+    assert restored.stats()['restored'] == 1
@@ -0,0 +1,89 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import io, json, threading
+import pytest
+import telebot.apihelper
+import streaming
+
+FILE = bytes(range(256)) * 4096
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path, self.headers.get('X-API-Key')))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(FILE)))
+        self.end_headers()
+        self.wfile.write(FILE)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append(('POST', self.path, body))
+        payload = {'ok': True, 'result': {
+            'message_id': 1, 'date': 0, 'chat': {'id': 7, 'type': 'private'},
+            'video': {'file_id': 'FID', 'file_unique_id': 'U', 'width': 1, 'height': 1, 'duration': 1}
+        }}
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_address[1]}'
+    monkeypatch.setattr(telebot.apihelper, 'API_URL', url + '/bot{0}/{1}')
+    yield url, httpd.requests
+    httpd.shutdown()
+
+def task_result(url):
+    return SimpleNamespace(get_file_url=lambda: f'{url}/files/video.mp4', client=SimpleNamespace(headers={'X-API-Key': 'key'}))
+
+def test_download_streams_to_a_temp_file(server):
+    url, requests = server
+    file_obj, file_size = streaming.download_result(task_result(url), len(FILE))
+    with file_obj:
+        assert file_size == len(FILE)
+        assert file_obj.read() == FILE
+    assert requests == [('GET', '/files/video.mp4', 'key')]
+
+def test_download_over_the_limit_raises(server):
+    url, _ = server
+    with pytest.raises(streaming.FileTooLarge):
+        streaming.download_result(task_result(url), len(FILE) - 1)
+
+def test_multipart_stream_length_matches_body():
+    body = streaming.MultipartStream({'chat_id': 7, 'caption': 'Привет'}, 'video', 'clip.mp4', io.BytesIO(b'x' * 10), 10, chunk_size=3)
+    data = b''.join(body)
+    assert len(data) == len(body)
+    assert b'name="caption"\r\n\r\n' + 'Привет'.encode('utf-8') in data
+    assert data.endswith(f'\r\n--{body.boundary}--\r\n'.encode('utf-8'))
+
+def test_send_file_uploads_the_stream(server):
+    url, requests = server
+    message = streaming.send_file('sendVideo', 'video', 7, io.BytesIO(FILE), len(FILE), 'clip.mp4', caption='hi', supports_streaming=True)
+    assert message.video.file_id == 'FID'
+    method, path, body = requests[-1]
+    assert path == '/bot123456:test/sendVideo'
+    assert b'name="supports_streaming"\r\n\r\ntrue' in body
+    assert FILE in body
+
+def test_send_local_file_passes_a_file_uri(server):
+    _, requests = server
+    streaming.send_local_file('sendVideo', 'video', 7, '/srv/files/clip.mp4', caption='hi')
+    method, path, body = requests[-1]
+    assert path == '/bot123456:test/sendVideo'
+    assert b'video=file%3A%2F%2F%2Fsrv%2Ffiles%2Fclip.mp4' in body
+    assert FILE not in body
+
+def test_local_file_path_maps_host_paths(monkeypatch):
+    import utils
+    monkeypatch.setattr(utils, 'LOCAL_FILES_PATH_MAP', {'/files/': '/srv/downloads'})
+    assert utils.local_file_path(SimpleNamespace(status={'file': '/files/abc/clip%20one.mp4'})) == '/srv/downloads/abc/clip one.mp4'
+    assert utils.local_file_path(SimpleNamespace(status={'file': '/other/clip.mp4'})) is None
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+from yt_dlp_host_api.exceptions import APIError
+from tasks import TaskWatcher
+import threading, time
+import pytest
+
+class FakeTask:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.polled_at = []
+        self.client = SimpleNamespace(host_url='http://host', headers={})
+        self.task_id = 'task'
+
+    def get_status(self):
+        self.polled_at.append(time.monotonic())
+        return {'status': self.statuses.pop(0), 'file': '/files/x'}
+
+def gaps(task):
+    return [later - earlier for earlier, later in zip(task.polled_at, task.polled_at[1:])]
+
+def test_polls_back_off_until_completed():
+    watcher = TaskWatcher(min_delay=0.02, max_delay=0.08, backoff=2, timeout=5)
+    task = FakeTask(['waiting', 'processing', 'processing', 'processing', 'completed'])
+    result = watcher.watch(task).result(5)
+    assert result.status['status'] == 'completed'
+    assert len(task.polled_at) == 5
+    delays = gaps(task)
+    assert delays[0] >= 0.035
+    assert delays[-1] >= 0.075
+    assert max(delays) < 0.5
+    assert watcher.stats()['completed'] == 1
+
+def test_fixed_interval_polls_immediately():
+    watcher = TaskWatcher(min_delay=1, max_delay=10, backoff=2, timeout=5)
+    task = FakeTask(['waiting', 'waiting', 'completed'])
+    started = time.monotonic()
+    watcher.watch(task, expected=20, interval=0.02).result(5)
+    assert task.polled_at[0] - started < 0.5
+    assert all(gap < 0.5 for gap in gaps(task))
+
+def test_error_status_fails_the_future():
+    watcher = TaskWatcher(min_delay=0.01, max_delay=0.01, timeout=5)
+    with pytest.raises(APIError):
+        watcher.watch(FakeTask(['error'])).result(5)
+    assert watcher.stats()['failed'] == 1
+
+def test_timeout_fails_the_future():
+    watcher = TaskWatcher(min_delay=0.01, max_delay=0.01, timeout=0.05)
+    with pytest.raises(APIError):
+        watcher.watch(FakeTask(['waiting'] * 100)).result(5)
+
+def test_slow_progress_callback_does_not_block_polling():
+    watcher = TaskWatcher(min_delay=0.01, max_delay=0.01, timeout=5, poll_workers=1)
+    release = threading.Event()
+    slow = watcher.watch(FakeTask(['waiting', 'completed']), on_status=lambda status, elapsed: release.wait(5))
+    fast = watcher.watch(FakeTask(['waiting', 'waiting', 'completed']))
+    fast.result(2)
+    release.set()
+    slow.result(5)